@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+"""Startup benchmark for the GUI and for `bleachbit_updater.py --help`.
+
+Each command is run several times under ``python -X importtime``. The import time
+it adds on top of a bare interpreter (median over the runs) is compared with a
+budget, and the run fails if a module that is meant to load lazily shows up.
+
+Usage: python benchmarks/startup_importtime.py [--runs N] [--scale FACTOR]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Milliseconds of import time allowed on top of the bare interpreter
+BUDGETS_MS = {
+    'gui': 40,
+    'updater --help': 60,
+}
+
+# Modules that must only be imported once an operation needs them
+LAZY_MODULES = ('requests', 'bs4', 'tqdm', 'http.server', 'cleaner_browser', 'bleachbit_settings_manager')
+
+COMMANDS = {
+    # Creating the Tk window needs a display, so the GUI is measured up to that point
+    'gui': ['-c', 'import cleaner_manager_gui'],
+    'updater --help': [os.path.join(PROJECT_DIR, 'bleachbit_updater.py'), '--help'],
+}
+
+
+def run_importtime(args, cwd):
+    """Run ``python -X importtime <args>`` and return {module: cumulative microseconds} for top-level imports."""
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + args, cwd=cwd,
+                            capture_output=True, text=True, env=dict(os.environ, PYTHONPATH=PROJECT_DIR))
+    if result.returncode != 0:
+        raise RuntimeError(f'{args} failed: {result.stderr[-2000:]}')
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented; only top-level entries are summed
+        modules[name.strip()] = (int(cumulative), not name[1:].startswith(' '))
+    return modules
+
+
+def measure(args, baseline, runs, cwd):
+    totals = []
+    imported = set()
+    for _ in range(runs):
+        modules = run_importtime(args, cwd)
+        imported.update(modules)
+        totals.append(sum(us for name, (us, top_level) in modules.items()
+                          if top_level and name not in baseline) / 1000)
+    return statistics.median(totals), imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=7, help='Runs per command (default: %(default)s)')
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiply the budgets, e.g. on slow machines')
+    args = parser.parse_args()
+
+    failed = False
+    # Run from an empty directory so stray files created at startup are noticed
+    with tempfile.TemporaryDirectory() as cwd:
+        baseline = set(run_importtime(['-c', 'pass'], cwd))
+        for name, command in COMMANDS.items():
+            median_ms, imported = measure(command, baseline, args.runs, cwd)
+            budget = BUDGETS_MS[name] * args.scale
+            status = 'ok' if median_ms <= budget else 'OVER BUDGET'
+            print(f'{name:16} {median_ms:7.1f} ms  (budget {budget:.0f} ms)  {status}')
+            failed |= median_ms > budget
+
+            eager = [module for module in LAZY_MODULES if module in imported]
+            if eager:
+                print(f'{"":16} imported eagerly: {", ".join(eager)}')
+                failed = True
+
+        created = os.listdir(cwd)
+        if created:
+            print(f'Startup created files in the working directory: {", ".join(created)}')
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+
+"""Micro-benchmark for the compiled whitelist matcher.
+
+Builds a synthetic whitelist of literal folders, files and wildcard entries, then
+times :meth:`bleachbit_whitelist.Whitelist.is_protected` over millions of synthetic
+paths. A sample of the paths is also checked against a naive matcher that tries
+every entry in turn; the run fails if the two disagree or if the compiled lookup
+exceeds its per-path budget.
+
+Usage: python benchmarks/whitelist_match.py [--paths N] [--entries N] [--scale FACTOR]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from bleachbit_whitelist import Whitelist, normalize, translate  # noqa: E402
+
+# Microseconds allowed per is_protected() call
+BUDGET_US = 5.0
+# Paths generated and timed per batch, so memory stays flat however many are requested
+BATCH = 100_000
+ROOT = os.path.join(os.path.abspath(os.sep), 'bench')
+
+
+def synthetic_entries(count, rng):
+    """Return ``(path, kind)`` entries: mostly folders, some files, some wildcards."""
+    entries = []
+    for i in range(count):
+        vendor = f'vendor{rng.randrange(200)}'
+        app = f'app{rng.randrange(50)}'
+        roll = rng.random()
+        if roll < 0.6:
+            entries.append((os.path.join(ROOT, vendor, app, f'keep{i}'), 'folder'))
+        elif roll < 0.9:
+            entries.append((os.path.join(ROOT, vendor, app, 'data', f'file{i}.db'), 'file'))
+        else:
+            entries.append((os.path.join(ROOT, vendor, app, '*', f'*.k{i % 10}'), 'folder'))
+    return entries
+
+
+def synthetic_paths(count, entries, rng):
+    """Yield paths, about a quarter of them below or at a whitelist entry."""
+    for _ in range(count):
+        if rng.random() < 0.25:
+            path = rng.choice(entries)[0].replace('*', f'x{rng.randrange(9)}')
+            if rng.random() < 0.5:
+                path = os.path.join(path, f'child{rng.randrange(100)}.tmp')
+        else:
+            path = os.path.join(ROOT, f'vendor{rng.randrange(200)}', f'app{rng.randrange(50)}',
+                                rng.choice(['cache', 'data', 'logs']), f'f{rng.randrange(10 ** 6)}.tmp')
+        yield path
+
+
+class NaiveWhitelist:
+    """Reference matcher: every path is checked against every entry."""
+
+    def __init__(self, entries):
+        sep = re.escape(os.sep)
+        self.regexes = []
+        for path, kind in entries:
+            regex = sep.join(translate(part) for part in normalize(path))
+            if kind != 'file':
+                regex += f'(?:{sep}.*)?'
+            self.regexes.append(re.compile(regex, re.DOTALL))
+
+    def is_protected(self, path):
+        path = os.sep.join(normalize(path))
+        return any(regex.fullmatch(path) for regex in self.regexes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--paths', type=int, default=2_000_000, help='Paths to look up (default: %(default)s)')
+    parser.add_argument('--entries', type=int, default=5_000, help='Whitelist entries (default: %(default)s)')
+    parser.add_argument('--sample', type=int, default=5_000,
+                        help='Paths also checked with the naive matcher (default: %(default)s)')
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiply the budget, e.g. on slow machines')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    entries = synthetic_entries(args.entries, rng)
+    started = time.perf_counter()
+    whitelist = Whitelist(entries)
+    whitelist.is_protected(ROOT)
+    build_s = time.perf_counter() - started
+
+    elapsed = 0.0
+    protected = 0
+    remaining = args.paths
+    while remaining:
+        batch = list(synthetic_paths(min(BATCH, remaining), entries, rng))
+        remaining -= len(batch)
+        is_protected = whitelist.is_protected
+        started = time.perf_counter()
+        protected += sum(1 for path in batch if is_protected(path))
+        elapsed += time.perf_counter() - started
+    compiled_us = elapsed / args.paths * 1e6
+
+    naive = NaiveWhitelist(entries)
+    sample = list(synthetic_paths(args.sample, entries, rng))
+    started = time.perf_counter()
+    expected = [naive.is_protected(path) for path in sample]
+    naive_us = (time.perf_counter() - started) / len(sample) * 1e6
+    mismatches = [path for path, want in zip(sample, expected) if whitelist.is_protected(path) != want]
+
+    budget = BUDGET_US * args.scale
+    print(f'entries          {args.entries:>10}   (compiled in {build_s * 1000:.0f} ms)')
+    print(f'paths            {args.paths:>10}   ({protected} protected)')
+    print(f'compiled         {compiled_us:10.2f} us/path  (budget {budget:.1f} us)  '
+          f'{"ok" if compiled_us <= budget else "OVER BUDGET"}')
+    print(f'naive            {naive_us:10.2f} us/path  ({naive_us / compiled_us:.0f}x slower, '
+          f'{len(sample)} path sample)')
+    for path in mismatches[:10]:
+        print(f'mismatch: {path}')
+    return 1 if mismatches or compiled_us > budget else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,20 +1,41 @@
 #!/usr/bin/env python3
 
+import hashlib
 import json
 import os
 import shutil
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+METADATA_FILE = 'backup_metadata.json'
+# Files are hashed in large sequential reads, several files at a time
+HASH_BLOCK_SIZE = 4 * 1024 * 1024
+HASH_WORKERS = min(8, os.cpu_count() or 2)
+
+def hash_file(path):
+    """Return (size, sha256 hex digest) of a file."""
+    digest = hashlib.sha256()
+    size = 0
+    buffer = bytearray(HASH_BLOCK_SIZE)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            count = f.readinto(buffer)
+            if not count:
+                break
+            digest.update(view[:count])
+            size += count
+    return size, digest.hexdigest()
+
 class BleachBitSettingsManager:
     def __init__(self):
         # Get BleachBit config directory
         self.config_dir = os.path.join(os.getenv('APPDATA'), 'BleachBit') if os.name == 'nt' else \
                          os.path.expanduser('~/.config/bleachbit')
         
-        # Ensure backup directory exists
+        # Created on first backup, so constructing a manager has no side effects
         self.backup_dir = os.path.join(self.config_dir, 'backups')
-        os.makedirs(self.backup_dir, exist_ok=True)
         
         # Define important files to backup
         self.important_files = [
@@ -42,29 +63,125 @@ class BleachBitSettingsManager:
                 else:
                     shutil.copy2(src, dst)
         
-        # Create metadata file
+        # Create metadata file, with a checksum manifest of what was copied
         metadata = {
             'backup_date': datetime.datetime.now().isoformat(),
-            'backup_items': self.important_files
+            'backup_items': self.important_files,
+            'manifest': self._build_manifest(backup_path)
         }
         
-        with open(os.path.join(backup_path, 'backup_metadata.json'), 'w') as f:
+        with open(os.path.join(backup_path, METADATA_FILE), 'w') as f:
             json.dump(metadata, f, indent=4)
         
         return backup_path
     
-    def restore_backup(self, backup_name):
-        """Restore BleachBit settings from a backup."""
+    def _backup_files(self, backup_path):
+        """Yield the '/'-separated relative paths of the files stored in a backup."""
+        for item in self.important_files:
+            path = os.path.join(backup_path, item)
+            if os.path.isdir(path):
+                for root, _, files in os.walk(path):
+                    for name in files:
+                        yield os.path.relpath(os.path.join(root, name), backup_path).replace(os.sep, '/')
+            elif os.path.isfile(path):
+                yield item
+    
+    def _build_manifest(self, backup_path):
+        """Hash every file in a backup in parallel."""
+        files = sorted(self._backup_files(backup_path))
+        with ThreadPoolExecutor(max_workers=HASH_WORKERS) as pool:
+            hashes = pool.map(hash_file, [os.path.join(backup_path, *name.split('/')) for name in files])
+            return {name: {'size': size, 'sha256': sha256} for name, (size, sha256) in zip(files, hashes)}
+    
+    def verify_backup(self, backup_name):
+        """Rehash one backup against its manifest; see scrub_backups for the report format."""
+        return self.scrub_backups([backup_name])[0]
+    
+    def scrub_backups(self, backup_names=None):
+        """Rehash backups (all of them by default) against their manifests in parallel.
+        
+        Returns one report per backup: a dict with 'name', 'ok', 'has_manifest', 'checked'
+        (files hashed), 'bytes', and sorted lists of 'missing', 'corrupted' and 'unexpected'
+        (present but not in the manifest) files. Backups made before manifests were recorded
+        have nothing to check against and are reported ok with has_manifest False.
+        """
+        if backup_names is None:
+            backup_names = [backup['name'] for backup in self.list_backups()]
+        
+        reports = []
+        jobs = []
+        for name in backup_names:
+            backup_path = os.path.join(self.backup_dir, name)
+            report = {'name': name, 'ok': False, 'has_manifest': True, 'checked': 0, 'bytes': 0,
+                      'missing': [], 'corrupted': [], 'unexpected': []}
+            reports.append(report)
+            try:
+                with open(os.path.join(backup_path, METADATA_FILE), 'r') as f:
+                    manifest = json.load(f).get('manifest')
+            except FileNotFoundError:
+                report['missing'].append(METADATA_FILE)
+                continue
+            except ValueError:
+                report['corrupted'].append(METADATA_FILE)
+                continue
+            if manifest is None:
+                report['has_manifest'] = False
+                continue
+            
+            report['unexpected'] = sorted(set(self._backup_files(backup_path)) - set(manifest))
+            for file_name, expected in manifest.items():
+                path = os.path.join(backup_path, *file_name.split('/'))
+                try:
+                    size = os.path.getsize(path)
+                except OSError:
+                    report['missing'].append(file_name)
+                    continue
+                # A changed size needs no hashing to be reported
+                if size != expected['size']:
+                    report['corrupted'].append(file_name)
+                    continue
+                jobs.append((report, file_name, expected['sha256'], path))
+        
+        # One pool for all backups, so a scrub keeps every worker busy
+        with ThreadPoolExecutor(max_workers=HASH_WORKERS) as pool:
+            futures = [(job, pool.submit(hash_file, job[3])) for job in jobs]
+            for (report, file_name, sha256, _), future in futures:
+                try:
+                    size, actual = future.result()
+                except OSError:
+                    report['missing'].append(file_name)
+                    continue
+                report['checked'] += 1
+                report['bytes'] += size
+                if actual != sha256:
+                    report['corrupted'].append(file_name)
+        
+        for report in reports:
+            report['missing'].sort()
+            report['corrupted'].sort()
+            report['ok'] = not report['missing'] and not report['corrupted']
+        return reports
+    
+    def restore_backup(self, backup_name, verify=True):
+        """Restore BleachBit settings from a backup, after checking it against its manifest."""
         backup_path = os.path.join(self.backup_dir, backup_name)
         
         if not os.path.exists(backup_path):
             raise FileNotFoundError(f'Backup {backup_name} not found')
         
         # Verify backup integrity
-        metadata_file = os.path.join(backup_path, 'backup_metadata.json')
+        metadata_file = os.path.join(backup_path, METADATA_FILE)
         if not os.path.exists(metadata_file):
             raise ValueError('Invalid backup: missing metadata file')
         
+        # Nothing is deleted until every file of the backup is known to be intact
+        if verify:
+            report = self.verify_backup(backup_name)
+            if not report['ok']:
+                damaged = report['corrupted'] + report['missing']
+                raise ValueError(f"Backup {backup_name} failed verification: {len(report['corrupted'])} corrupted, "
+                                 f"{len(report['missing'])} missing file(s) ({', '.join(damaged[:5])})")
+        
         # Create a backup before restoring
         self.create_backup('pre_restore_backup')
         
@@ -83,8 +200,10 @@ class BleachBitSettingsManager:
     def list_backups(self):
         """List all available backups."""
         backups = []
+        if not os.path.isdir(self.backup_dir):
+            return backups
         for item in os.listdir(self.backup_dir):
-            metadata_file = os.path.join(self.backup_dir, item, 'backup_metadata.json')
+            metadata_file = os.path.join(self.backup_dir, item, METADATA_FILE)
             if os.path.exists(metadata_file):
                 with open(metadata_file, 'r') as f:
                     metadata = json.load(f)
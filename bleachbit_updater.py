@@ -1,24 +1,67 @@
 # bleachbit_updater.py
 
-import requests
+# requests, bs4 and tqdm are imported inside the functions that use them: together they
+# take longer to import than a cached --check-only run takes to complete.
 import re
 import argparse
 from datetime import datetime
-from bs4 import BeautifulSoup
 import os
 import subprocess
 import sys
 import logging
-from tqdm import tqdm
-from typing import Optional, Tuple, Dict
+import socket
+import time
+from functools import partial
+from urllib.parse import quote, urlparse
+from typing import TYPE_CHECKING, Optional, Tuple, Dict
+from updater_metrics import UpdaterMetrics
+from download_limiter import DownloadLimiter, DownloadWindow, format_rate, parse_rate
+from installer_cache import DEFAULT_MAX_BYTES, InstallerCache
+from installer_verify import (SIGNATURE_SUFFIXES, ThreadedSHA256, find_published_sha256, sha256_mmap,
+                              verify_signature)
+from bleachbit_version import BleachBitVersion, is_update_available
+from updater_state import UpdaterState
+
+if TYPE_CHECKING:
+    import requests
+    from bs4 import BeautifulSoup
 
 BLEACHBIT_DOWNLOAD_URL = "https://www.bleachbit.org/download"
 BLEACHBIT_NEWS_URL = "https://www.bleachbit.org/news"
 BLEACHBIT_CI_URL = "https://ci.bleachbit.org/"
 
+CHANNELS = ("stable", "beta", "unstable")
+CHANNEL_LABELS = {"stable": "Stable", "beta": "Beta", "unstable": "Unstable (CI build)"}
+
+# Exit status of --check-only when a newer version is available (as with `yum check-update`)
+EXIT_UPDATE_AVAILABLE = 100
+
+# Seconds a release lookup is reused before the website is asked again
+RELEASE_CACHE_TTL = 3600
+
+# Hosts a --serve-mirror instance will download from on behalf of clients
+MIRROR_ALLOWED_HOSTS = ("download.bleachbit.org", "www.bleachbit.org", "ci.bleachbit.org")
+
+# Number of times a failed GET is retried on connection errors and 5xx responses
+HTTP_RETRIES = 2
+
+# Seconds a client waits for the LAN mirror to fetch an installer before downloading it directly
+MIRROR_MAX_WAIT = 30 * 60
+# Seconds between requests while the mirror is fetching, unless it sends Retry-After
+MIRROR_POLL_INTERVAL = 5
+
+# Bytes read from the network per iteration; large enough that the hashing thread's updates release the GIL
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Checksum and signature files larger than this are not what they claim to be
+MAX_SIDECAR_BYTES = 1024 * 1024
+
 # Global debug mode flag
 DEBUG_MODE = False
 
+# Timing spans and counters; disabled unless a metrics export is requested
+METRICS = UpdaterMetrics()
+
 # Initialize logging first
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -31,19 +74,94 @@ console_handler = logging.StreamHandler()
 console_handler.setFormatter(formatter)
 logger.addHandler(console_handler)
 
-# File handler
-file_handler = logging.FileHandler('bleachbit_updater.log')
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
+# Log file written by the command line tool; see _add_file_handler()
+LOG_FILE = 'bleachbit_updater.log'
+
+def _add_file_handler():
+    """Starts logging to LOG_FILE. Called from main() so importing this module creates no files."""
+    file_handler = logging.FileHandler(LOG_FILE)
+    file_handler.setFormatter(formatter)
+    logger.addHandler(file_handler)
+
+_sessions: Dict[bool, "requests.Session"] = {}
+
+def _get_session(retry_unavailable: bool = True) -> "requests.Session":
+    """Returns a shared HTTP session so repeated fetches reuse connections.
+
+    Without ``retry_unavailable``, 503 responses are returned to the caller instead of
+    retried, for the LAN mirror's "still fetching" answer.
+    """
+    session = _sessions.get(retry_unavailable)
+    if session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        status_forcelist = (500, 502, 503, 504) if retry_unavailable else (500, 502, 504)
+        # urllib3 also retries any 503 that carries Retry-After unless told not to
+        retries = Retry(total=HTTP_RETRIES, backoff_factor=0.5, status_forcelist=status_forcelist,
+                        allowed_methods=("GET", "HEAD"), respect_retry_after_header=retry_unavailable)
+        adapter = HTTPAdapter(max_retries=retries)
+        session = _sessions[retry_unavailable] = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+    return session
+
+def _retry_count(response: "requests.Response") -> int:
+    retries = getattr(response.raw, "retries", None)
+    return len(retries.history) if retries is not None else 0
+
+def http_get(url: str, resource: str, timeout: float, stream: bool = False,
+             headers: Optional[Dict[str, str]] = None, retry_unavailable: bool = True) -> "requests.Response":
+    """GETs a URL, recording DNS, time to first byte, retries and bytes when metrics are enabled."""
+    host = urlparse(url).hostname or ""
+    with METRICS.span("fetch", resource=resource, host=host) as span:
+        if METRICS.enabled and host:
+            # Resolve separately so slow DNS shows up on its own; the OS caches the answer
+            # for the request that follows. requests does not expose connect time, so it
+            # is part of the TTFB figure.
+            with METRICS.span("dns", host=host):
+                try:
+                    socket.getaddrinfo(host, None)
+                except OSError:
+                    pass
+        response = _get_session(retry_unavailable).get(url, timeout=timeout, stream=stream, headers=headers)
+        if METRICS.enabled:
+            retries = _retry_count(response)
+            span.set(status=response.status_code, ttfb=round(response.elapsed.total_seconds(), 6), retries=retries)
+            if retries:
+                METRICS.incr("http_retries", retries, resource=resource)
+            if not stream:
+                span.add_bytes(len(response.content))
+        return response
+
+def parse_html(content: bytes, page: str) -> "BeautifulSoup":
+    """Parses an HTML page inside a timing span."""
+    from bs4 import BeautifulSoup
+    with METRICS.span("parse", page=page) as span:
+        span.add_bytes(len(content))
+        return BeautifulSoup(content, "html.parser")
+
+def export_metrics(json_path: Optional[str] = None, prom_path: Optional[str] = None):
+    """Writes the collected metrics to the requested report files."""
+    try:
+        if json_path:
+            METRICS.write_json(json_path)
+            logger.debug(f"Wrote metrics report to {json_path}")
+        if prom_path:
+            METRICS.write_prometheus(prom_path)
+            logger.debug(f"Wrote Prometheus metrics to {prom_path}")
+    except OSError as e:
+        logger.error(f"Failed to write metrics: {e}")
 
 def get_latest_bleachbit_versions():
     """Fetches the latest stable and beta BleachBit versions from the website."""
+    import requests
     versions = {"stable": None, "beta": None, "stable_url": None, "beta_url": None}
     try:
         # Try the news page first as it often has direct links and version numbers for recent releases
-        response = requests.get(BLEACHBIT_NEWS_URL, timeout=10)
+        response = http_get(BLEACHBIT_NEWS_URL, "news", timeout=10)
         response.raise_for_status()
-        soup = BeautifulSoup(response.content, "html.parser")
+        soup = parse_html(response.content, "news")
 
         # Look for release announcements in the news section
         # This is a heuristic and might need adjustment if the website structure changes
@@ -78,9 +196,9 @@ def get_latest_bleachbit_versions():
                 break
         
         # Fallback or supplement with the main download page
-        response_dl = requests.get(BLEACHBIT_DOWNLOAD_URL, timeout=10)
+        response_dl = http_get(BLEACHBIT_DOWNLOAD_URL, "download_page", timeout=10)
         response_dl.raise_for_status()
-        soup_dl = BeautifulSoup(response_dl.content, "html.parser")
+        soup_dl = parse_html(response_dl.content, "download_page")
 
         # Find download links for Windows
         # Example: <a href="https://download.bleachbit.org/BleachBit-4.6.0-setup.exe">BleachBit 4.6.0 installer</a>
@@ -127,12 +245,13 @@ def get_latest_bleachbit_versions():
 
 def get_latest_ci_build_url():
     """Fetches the URL for the latest unstable BleachBit build from the CI server."""
+    import requests
     if DEBUG_MODE:
         print(f"[DEBUG] Fetching CI build list from {BLEACHBIT_CI_URL}")
     try:
-        response = requests.get(BLEACHBIT_CI_URL, timeout=15)
+        response = http_get(BLEACHBIT_CI_URL, "ci_index", timeout=15)
         response.raise_for_status()
-        soup = BeautifulSoup(response.content, "html.parser")
+        soup = parse_html(response.content, "ci_index")
 
         latest_build_dir = None
         latest_build_date = None
@@ -168,9 +287,9 @@ def get_latest_ci_build_url():
             print(f"[DEBUG] Latest CI build directory URL: {latest_build_dir_url}")
 
         # Now fetch the contents of the latest build directory
-        response_build = requests.get(latest_build_dir_url, timeout=15)
+        response_build = http_get(latest_build_dir_url, "ci_build", timeout=15)
         response_build.raise_for_status()
-        soup_build = BeautifulSoup(response_build.content, "html.parser")
+        soup_build = parse_html(response_build.content, "ci_build")
 
         # Look for the .exe installer link, typically 'BleachBit-setup.exe'
         for link in soup_build.find_all("a", href=True):
@@ -192,8 +311,216 @@ def get_latest_ci_build_url():
     return None, None
 
 
-def download_bleachbit(url: str, download_path: str = "downloads") -> Optional[str]:
-    """Downloads a file from the given URL with progress bar and enhanced error handling."""
+def get_validator(url: str) -> str:
+    """Returns the server's ETag or Last-Modified for ``url``, or "" if unavailable."""
+    import requests
+    try:
+        with METRICS.span("fetch", resource="installer_head", host=urlparse(url).hostname or ""):
+            response = _get_session().head(url, timeout=10, allow_redirects=True)
+            response.raise_for_status()
+        return response.headers.get("ETag") or response.headers.get("Last-Modified") or ""
+    except requests.exceptions.RequestException as e:
+        logger.debug(f"Could not fetch validator for {url}: {e}")
+        return ""
+
+def _open_download(url: str, resource: str, headers: Optional[Dict[str, str]] = None) -> "requests.Response":
+    response = http_get(url, resource, timeout=30, stream=True, headers=headers)
+    response.raise_for_status()
+    return response
+
+def _stream_to_file(response: "requests.Response", filepath: str, filename: str,
+                    limiter: Optional[DownloadLimiter] = None, reopen=None) -> str:
+    """Writes a streamed response to ``filepath`` with a progress bar and returns its SHA-256.
+
+    The data goes to a temporary file that replaces ``filepath`` only once complete, so an
+    interrupted download never leaves a truncated installer (or truncates a cached installer
+    hard-linked at that path). Chunks are hashed on a separate thread as they arrive, so the
+    file is never read back to verify it.
+
+    ``limiter`` caps the rate. When its time window closes the connection is dropped, and once
+    it reopens ``reopen(headers)`` requests the rest of the file with a range request; a server
+    that ignores the range sends the whole file again and the download starts over.
+    """
+    from tqdm import tqdm
+    total_size = int(response.headers.get('content-length', 0))
+    validator = response.headers.get("ETag") or response.headers.get("Last-Modified")
+    chunk_size = limiter.chunk_size(DOWNLOAD_CHUNK_SIZE) if limiter else DOWNLOAD_CHUNK_SIZE
+    digest = ThreadedSHA256()
+    downloaded = 0
+    tmp_path = filepath + ".part"
+    with METRICS.span("download", host=urlparse(response.url).hostname or "") as span:
+        span.set(content_length=total_size)
+        try:
+            with open(tmp_path, 'wb') as f, tqdm(
+                desc=filename,
+                total=total_size,
+                unit='iB',
+                unit_scale=True,
+                unit_divisor=1024,
+            ) as pbar:
+                while True:
+                    paused = False
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        size = f.write(chunk)
+                        digest.update(chunk)
+                        downloaded += size
+                        pbar.update(size)
+                        if limiter:
+                            limiter.throttle(size)
+                            if reopen and limiter.should_pause():
+                                paused = True
+                                break
+                    if not paused:
+                        break
+
+                    response.close()
+                    logger.info(f"Download window {limiter.window} closed, pausing {filename} "
+                                f"after {downloaded} bytes")
+                    limiter.wait_for_window()
+                    headers = {"Range": f"bytes={downloaded}-"}
+                    if validator:
+                        headers["If-Range"] = validator
+                    response = reopen(headers)
+                    if response.status_code == 206 and \
+                            response.headers.get("Content-Range", "").startswith(f"bytes {downloaded}-"):
+                        logger.info(f"Resuming {filename} at byte {downloaded}")
+                    else:
+                        logger.info(f"Server does not support resuming, restarting {filename}")
+                        f.seek(0)
+                        f.truncate()
+                        digest.close()
+                        digest = ThreadedSHA256()
+                        downloaded = 0
+                        pbar.reset()
+            os.replace(tmp_path, filepath)
+        finally:
+            digest.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        span.add_bytes(downloaded)
+        if limiter:
+            span.set(throttled_seconds=round(limiter.throttled_seconds, 3),
+                     paused_seconds=round(limiter.paused_seconds, 3))
+    return digest.hexdigest()
+
+def _wait_for_mirror(mirror_url: str, filename: str) -> "requests.Response":
+    """Requests ``mirror_url``, polling while the mirror answers 503 because it is still fetching.
+
+    Gives up after MIRROR_MAX_WAIT seconds; raises a RequestException for any error response.
+    """
+    deadline = time.monotonic() + MIRROR_MAX_WAIT
+    while True:
+        response = http_get(mirror_url, "mirror", timeout=30, stream=True, retry_unavailable=False)
+        remaining = deadline - time.monotonic()
+        if response.status_code != 503 or remaining <= 0:
+            response.raise_for_status()
+            return response
+        response.close()
+        try:
+            delay = float(response.headers.get("Retry-After", MIRROR_POLL_INTERVAL))
+        except ValueError:
+            delay = MIRROR_POLL_INTERVAL
+        logger.info(f"Mirror is fetching {filename}, asking again in {delay:g} s")
+        time.sleep(max(0.0, min(delay, remaining)))
+
+def _download_from_mirror(mirror: str, url: str, filepath: str, filename: str,
+                          limiter: Optional[DownloadLimiter] = None) -> Optional[str]:
+    """Fetches ``url`` through a LAN mirror; returns the SHA-256, or None to fall back to ``url``."""
+    import requests
+    mirror_url = f"{mirror.rstrip('/')}/fetch?url={quote(url, safe='')}"
+    try:
+        logger.info(f"Trying mirror {mirror} for {filename}")
+        response = _wait_for_mirror(mirror_url, filename)
+        expected = response.headers.get("X-Content-SHA256", "").lower()
+        sha256 = _stream_to_file(response, filepath, filename, limiter, partial(_open_download, mirror_url, "mirror"))
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Mirror unavailable, downloading directly: {e}")
+        return None
+    if expected and sha256 != expected:
+        logger.warning(f"Mirror sent corrupted data for {filename} (SHA-256 mismatch), downloading directly")
+        os.remove(filepath)
+        return None
+    METRICS.incr("mirror_hits")
+    return sha256
+
+def _fetch_sidecar(url: str) -> Optional[bytes]:
+    """Returns the body of a small file published next to an installer, or None if there is none."""
+    import requests
+    try:
+        response = http_get(url, "sidecar", timeout=10, stream=True)
+        with response:
+            if response.status_code != 200:
+                return None
+            content = response.raw.read(MAX_SIDECAR_BYTES + 1, decode_content=True)
+            return content if len(content) <= MAX_SIDECAR_BYTES else None
+    except requests.exceptions.RequestException as e:
+        logger.debug(f"Could not fetch {url}: {e}")
+        return None
+
+def fetch_published_sha256(url: str) -> Optional[str]:
+    """Returns the SHA-256 published for the installer at ``url`` (``.sha256`` file or SHA256SUMS), if any."""
+    def fetch_text(checksum_url: str) -> Optional[str]:
+        content = _fetch_sidecar(checksum_url)
+        return content.decode("utf-8", "replace") if content else None
+
+    sha256 = find_published_sha256(url, fetch_text)
+    if sha256:
+        logger.info(f"Published SHA-256 for {url.split('/')[-1]}: {sha256}")
+    else:
+        logger.debug(f"No published checksum found for {url}")
+    return sha256
+
+def verify_published_signature(url: str, filepath: str) -> Optional[bool]:
+    """Checks ``filepath`` against a detached signature published at ``url`` + .asc/.sig.
+
+    Returns None if no signature is published or gpg is not installed, otherwise whether it is valid.
+    """
+    for suffix in SIGNATURE_SUFFIXES:
+        content = _fetch_sidecar(url + suffix)
+        if not content:
+            continue
+        signature_path = filepath + suffix
+        with open(signature_path, "wb") as f:
+            f.write(content)
+        try:
+            with METRICS.span("verify", method="signature"):
+                valid = verify_signature(filepath, signature_path)
+        finally:
+            os.remove(signature_path)
+        if valid is None:
+            logger.warning(f"A signature is published for {os.path.basename(filepath)} but could not be checked "
+                           "(gpg is not installed or the signing key is not in the keyring)")
+        elif valid:
+            logger.info(f"Signature of {os.path.basename(filepath)} verified")
+        else:
+            METRICS.incr("verification_failures")
+            logger.error(f"Signature of {os.path.basename(filepath)} does not verify")
+        return valid
+    return None
+
+def _matches_expected(filename: str, sha256: str, expected_sha256: Optional[str]) -> bool:
+    if expected_sha256 and sha256 != expected_sha256.lower():
+        METRICS.incr("verification_failures")
+        logger.error(f"SHA-256 mismatch for {filename}: expected {expected_sha256.lower()}, got {sha256}")
+        return False
+    return True
+
+def download_bleachbit(url: str, download_path: str = "downloads", cache: Optional[InstallerCache] = None,
+                       mirror: Optional[str] = None, expected_sha256: Optional[str] = None,
+                       limiter: Optional[DownloadLimiter] = None) -> Optional[Tuple[str, str, Optional[bool]]]:
+    """Downloads a file from the given URL with progress bar and enhanced error handling.
+
+    Returns ``(path, sha256, signature)``, or None on failure; ``signature`` is the result
+    of :func:`verify_published_signature`. With ``cache``, an installer already fetched
+    from the same URL and validator is reused instead of downloaded, and new downloads are
+    added to the cache once verified. With ``mirror``, the LAN mirror at that base URL is
+    tried before the internet. With ``expected_sha256``, a matching file already in
+    ``download_path`` is reused, and a download that does not match is deleted and rejected.
+    A file whose published signature does not verify is never returned or cached; a cached
+    one is evicted and downloaded again. ``limiter`` caps the download rate and confines
+    the download to its time window.
+    """
+    import requests
     if not os.path.exists(download_path):
         os.makedirs(download_path)
     
@@ -201,27 +528,59 @@ def download_bleachbit(url: str, download_path: str = "downloads") -> Optional[s
     filepath = os.path.join(download_path, filename)
     
     try:
-        logger.info(f"Starting download of {filename} from {url}")
-        response = requests.get(url, stream=True, timeout=30)
-        response.raise_for_status()
-        
-        # Get file size for progress bar
-        total_size = int(response.headers.get('content-length', 0))
-        
-        # Initialize progress bar
-        with open(filepath, 'wb') as f, tqdm(
-            desc=filename,
-            total=total_size,
-            unit='iB',
-            unit_scale=True,
-            unit_divisor=1024,
-        ) as pbar:
-            for chunk in response.iter_content(chunk_size=8192):
-                size = f.write(chunk)
-                pbar.update(size)
-        
-        logger.info(f"Successfully downloaded {filename} to {filepath}")
-        return filepath
+        if expected_sha256 and os.path.isfile(filepath):
+            with METRICS.span("verify", method="mmap"):
+                sha256 = sha256_mmap(filepath)
+            if sha256 != expected_sha256.lower():
+                logger.warning(f"{filepath} does not match the published checksum, downloading it again")
+            else:
+                signature = verify_published_signature(url, filepath)
+                if signature is not False:
+                    METRICS.incr("cache_hits", kind="downloads")
+                    logger.info(f"Using verified {filename} already in {download_path}")
+                    return filepath, sha256, signature
+                os.remove(filepath)
+
+        validator = ""
+        if cache is not None:
+            validator = get_validator(url)
+            entry = cache.lookup(url, validator)
+            if entry and _matches_expected(filename, entry["sha256"], expected_sha256):
+                cached_path = cache.materialize(entry, download_path)
+                signature = verify_published_signature(url, cached_path)
+                if signature is not False:
+                    METRICS.incr("cache_hits", kind="installer")
+                    logger.info(f"Using cached {filename} (SHA-256 {entry['sha256']})")
+                    return cached_path, entry["sha256"], signature
+                logger.warning(f"Evicting cached {filename}, downloading it again")
+                os.remove(cached_path)
+                cache.discard(entry["sha256"])
+            METRICS.incr("cache_misses", kind="installer")
+
+        if limiter and limiter.window and not limiter.window.is_open():
+            logger.info(f"Outside the download window {limiter.window}, waiting for it to open")
+            limiter.wait_for_window()
+
+        sha256 = None
+        if mirror:
+            sha256 = _download_from_mirror(mirror, url, filepath, filename, limiter)
+        if sha256 is None:
+            logger.info(f"Starting download of {filename} from {url}")
+            response = _open_download(url, "installer")
+            sha256 = _stream_to_file(response, filepath, filename, limiter, partial(_open_download, url, "installer"))
+
+        if not _matches_expected(filename, sha256, expected_sha256):
+            os.remove(filepath)
+            return None
+        # Checked before caching, so a bad installer never reaches the cache or the mirror's clients
+        signature = verify_published_signature(url, filepath)
+        if signature is False:
+            os.remove(filepath)
+            return None
+        logger.info(f"Successfully downloaded {filename} to {filepath} (SHA-256 {sha256})")
+        if cache is not None:
+            cache.store(url, validator, filepath, sha256=sha256)
+        return filepath, sha256, signature
     
     except requests.exceptions.RequestException as e:
         logger.error(f"Network error while downloading BleachBit: {e}")
@@ -237,230 +596,348 @@ def download_bleachbit(url: str, download_path: str = "downloads") -> Optional[s
             logger.exception("Detailed error traceback:")
     return None
 
-def select_version(versions: Dict[str, str], ci_version: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
-    """Interactive version selection with enhanced UI."""
+def serve_mirror(cache: InstallerCache, address: str, allowed_hosts=(), limiter: Optional[DownloadLimiter] = None):
+    """Runs the LAN mirror until interrupted. ``address`` is ``PORT`` or ``HOST:PORT``."""
+    from installer_mirror import MirrorServer
+    host, _, port = address.rpartition(":")
+    incoming = os.path.join(cache.root, "incoming")
+
+    def fetch_upstream(url: str) -> Optional[str]:
+        # Fetches run on the server's threads; each gets its own limiter, and they share the rate cap
+        result = download_bleachbit(url, incoming, cache=cache, expected_sha256=fetch_published_sha256(url),
+                                    limiter=limiter.new_download() if limiter else None)
+        if result:
+            os.remove(result[0])
+            return result[0]
+        return None
+
+    server = MirrorServer(cache, fetch_upstream, MIRROR_ALLOWED_HOSTS + tuple(allowed_hosts),
+                          host=host or "0.0.0.0", port=int(port))
+    try:
+        server.serve_forever()
+    finally:
+        server.shutdown()
+
+def get_available_versions(state: UpdaterState, channels: Tuple[str, ...] = CHANNELS,
+                           max_age: float = RELEASE_CACHE_TTL) -> Dict[str, Optional[str]]:
+    """Returns ``{channel: version, "<channel>_url": url}`` for the requested channels.
+
+    Lookups younger than ``max_age`` seconds are reused from the state file, so repeated
+    checks do not go back to the website.
+    """
+    versions = {}
+    now = time.time()
+    if "stable" in channels or "beta" in channels:
+        cached = state.get("releases")
+        if cached and now - cached["fetched"] < max_age:
+            METRICS.incr("cache_hits", kind="releases")
+            releases = cached["versions"]
+        else:
+            releases = get_latest_bleachbit_versions()
+            if releases.get("stable_url") or releases.get("beta_url"):
+                state.set("releases", {"fetched": now, "versions": releases})
+        versions.update(releases)
+    if "unstable" in channels:
+        cached = state.get("ci")
+        if cached and now - cached["fetched"] < max_age:
+            METRICS.incr("cache_hits", kind="ci")
+            ci_version, ci_url = cached["version"], cached["url"]
+        else:
+            ci_version, ci_url = get_latest_ci_build_url()
+            if ci_url:
+                state.set("ci", {"fetched": now, "version": ci_version, "url": ci_url})
+        versions["unstable"] = ci_version
+        versions["unstable_url"] = ci_url
+    return versions
+
+def select_version(versions: Dict[str, Optional[str]], installed: Optional[BleachBitVersion] = None,
+                   installed_ci: Optional[BleachBitVersion] = None) -> Optional[str]:
+    """Interactive version selection; returns the chosen channel, or None if cancelled."""
     print("\nAvailable BleachBit versions:")
     print("-" * 40)
     
-    options = []
-    if versions.get("stable"):
-        options.append(("1", f"Stable (v{versions['stable']})", versions.get("stable_url")))
-    if versions.get("beta"):
-        options.append(("2", f"Beta (v{versions['beta']})", versions.get("beta_url")))
-    if ci_version:
-        options.append(("3", f"Unstable (CI build: {ci_version})", ci_version))
-    
-    for num, desc, _ in options:
-        print(f"{num}. {desc}")
+    options = {}
+    for number, channel in enumerate(CHANNELS, start=1):
+        if not versions.get(f"{channel}_url"):
+            continue
+        latest = BleachBitVersion.parse(versions.get(channel))
+        note = "" if is_update_available(installed, latest, installed_ci) else " (installed)"
+        options[str(number)] = channel
+        print(f"{number}. {CHANNEL_LABELS[channel]}: {versions.get(channel)}{note}")
     print("-" * 40)
     
     while True:
-        choice = input("Select version to download (or 'q' to quit): ").strip().lower()
+        choice = input("Select version to install (or 'q' to quit): ").strip().lower()
         if choice == 'q':
-            return None, None
-        
-        for num, desc, url in options:
-            if choice == num:
-                logger.info(f"Selected: {desc}")
-                return desc, url
-        
+            return None
+        if choice in options:
+            logger.info(f"Selected: {CHANNEL_LABELS[options[choice]]}")
+            return options[choice]
         print("Invalid selection. Please try again.")
 
-def run_installer(filepath: str) -> bool:
-    """Runs the BleachBit installer."""
+def run_installer(filepath: str, expected_sha256: Optional[str] = None) -> bool:
+    """Runs the BleachBit installer silently (/S), through wine on non-Windows systems.
+
+    With ``expected_sha256`` the file is hashed again right before it runs, and it is not
+    run if it changed since it was downloaded or verified.
+    """
     if not filepath or not os.path.exists(filepath):
         logger.error("Installer file not found.")
         return False
-    
+    if expected_sha256:
+        with METRICS.span("verify", method="mmap"):
+            sha256 = sha256_mmap(filepath)
+        if not _matches_expected(os.path.basename(filepath), sha256, expected_sha256):
+            logger.error(f"Refusing to run {filepath}: it does not match the verified download.")
+            return False
+
+    # /S requests a silent install from the NSIS installer; this may require admin privileges.
+    command = [filepath, "/S"] if os.name == 'nt' else ['wine', filepath, "/S"]
     try:
-        logger.info("Starting BleachBit installer...")
-        if os.name == 'nt':
-            result = subprocess.run([filepath], check=True)
-        else:
-            result = subprocess.run(['wine', filepath], check=True)
-        
-        logger.info("Installation completed successfully.")
-        return result.returncode == 0
+        logger.info(f"Running installer: {filepath}")
+        with METRICS.span("installer"):
+            subprocess.run(command, check=True)
+        logger.info("BleachBit installation/update process finished.")
+        return True
     except subprocess.CalledProcessError as e:
-        logger.error(f"Installation failed with return code {e.returncode}")
-        if DEBUG_MODE:
-            logger.debug(f"Full error details: {str(e)}")
-        return False
+        logger.error(f"Installation failed with return code {e.returncode}. Try running manually with admin rights.")
+    except FileNotFoundError:
+        logger.error(f"Error: Installer {filepath} not found or command not executable.")
     except Exception as e:
-        logger.error(f"Unexpected error during installation: {e}")
+        logger.error(f"An unexpected error occurred while running the installer: {e}")
         if DEBUG_MODE:
             logger.exception("Detailed error traceback:")
-        return False
-
-def main():
-    """Main function with enhanced version selection and error handling."""
-    parser = argparse.ArgumentParser(description='BleachBit Updater - Fetches and installs BleachBit.')
-    parser.add_argument('--version', choices=['stable', 'beta', 'unstable'], help='Specify version to download (stable, beta, unstable). Default is to prompt.')
-    parser.add_argument('--debug', action='store_true', help='Enable debug mode')
-    args = parser.parse_args()
+    return False
 
-    global DEBUG_MODE # Declare intent to modify global DEBUG_MODE
-    if args.debug:
-        DEBUG_MODE = True
-        logger.setLevel(logging.DEBUG)
-        logger.debug("Debug mode enabled")
+def _installed_console_paths():
+    """Yields the locations where bleachbit_console.exe is commonly installed."""
+    for variable, parts in (("ProgramFiles(x86)", ("BleachBit",)),
+                            ("ProgramFiles", ("BleachBit",)),
+                            ("LocalAppData", ("Programs", "BleachBit"))):  # User install
+        base = os.environ.get(variable)
+        if base:
+            yield os.path.join(base, *parts, "bleachbit_console.exe")
 
-    logger.info("Fetching available BleachBit versions...")
+def _file_signature(path: str) -> Optional[list]:
     try:
-        logger.info("Fetching available BleachBit versions...")
-        versions = get_latest_bleachbit_versions()
-        
-        logger.debug(f"Found versions: {versions}")
-        
-        # Get CI build information
-        ci_version, ci_url = None, None
-        logger.debug("Checking CI server for unstable builds...")
-        ci_version, ci_url = get_latest_ci_build_url()
-
-        if not any([versions.get('stable_url'), versions.get('beta_url'), ci_url]):
-            logger.error("No BleachBit versions found for download.")
-            return
-
-        # Interactive version selection
-        selected_desc, download_url = select_version(versions, ci_version)
-        if not download_url:
-            logger.info("Update cancelled by user.")
-            return
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
 
-        # Download the selected version
-        installer_path = download_bleachbit(download_url)
-        if not installer_path:
-            logger.error("Download failed.")
-            return
-
-        # Run the installer
-        if run_installer(installer_path):
-            logger.info("BleachBit update completed successfully.")
+def _probe_version(path: str) -> Optional[str]:
+    try:
+        # BleachBit console outputs e.g. "BleachBit version 4.6.0" with --version
+        result = subprocess.run([path, "--version"], capture_output=True, text=True, timeout=5)
+    except Exception as e:
+        logger.debug(f"Version check failed for {path}: {e}")
+        return None
+    match = re.search(r"BleachBit (?:version )?(\d+\.\d+\.\d+(?:[ -]?beta\s*\d*)?)", result.stdout, re.IGNORECASE)
+    return match.group(1) if match else None
+
+def get_installed_bleachbit_version(state: Optional[UpdaterState] = None) -> Optional[str]:
+    """Attempts to get the installed BleachBit version on Windows.
+
+    With ``state``, the output of ``bleachbit_console.exe --version`` is cached against the
+    executable's mtime and size, so it is only run again after BleachBit has changed. Failed
+    probes are not cached, so a timeout is retried on the next run.
+    """
+    probes = state.get("installed_probe", {}) if state else {}
+    for path in _installed_console_paths():
+        signature = _file_signature(path)
+        if signature is None:
+            continue
+        cached = probes.get(path)
+        if cached and cached["signature"] == signature and cached["version"]:
+            METRICS.incr("cache_hits", kind="installed_version")
+            version = cached["version"]
         else:
-            logger.error("BleachBit installation failed.")
+            version = _probe_version(path)
+            if version and state:
+                probes[path] = {"signature": signature, "version": version}
+                state.set("installed_probe", probes)
+        if version:
+            return version
+    return None
 
-    except KeyboardInterrupt:
-        logger.info("\nUpdate cancelled by user.")
-    except Exception as e:
-        logger.error(f"An unexpected error occurred: {e}")
-        if logger.isEnabledFor(logging.DEBUG):
-            logger.exception("Detailed error traceback:")
+def get_installed_ci_build(state: UpdaterState) -> Optional[BleachBitVersion]:
+    """Returns the CI build this updater last installed, if BleachBit has not changed since."""
+    record = state.get("ci_installed")
+    if not record:
+        return None
+    if record["path"] and _file_signature(record["path"]) != record["signature"]:
+        state.remove("ci_installed")
+        return None
+    return BleachBitVersion.parse(record["build"])
+
+def _record_ci_install(state: UpdaterState, build: BleachBitVersion):
+    path = next((p for p in _installed_console_paths() if os.path.exists(p)), None)
+    signature = _file_signature(path) if path else None
+    state.set("ci_installed", {"build": str(build), "path": path, "signature": signature})
+
+def check_and_update(channel: Optional[str] = None, check_only: bool = False, force: bool = False,
+                     cache: Optional[InstallerCache] = None, mirror: Optional[str] = None,
+                     state: Optional[UpdaterState] = None, max_age: float = RELEASE_CACHE_TTL,
+                     expected_sha256: Optional[str] = None, require_verification: bool = False,
+                     limiter: Optional[DownloadLimiter] = None) -> int:
+    """Installs the latest release of ``channel`` if it is newer than the installed version.
+
+    Without ``channel`` the user is prompted to choose one. Returns the process exit status:
+    0 when BleachBit is current or was updated, EXIT_UPDATE_AVAILABLE when ``check_only``
+    finds a newer version, and 1 on errors. The installer is checked against
+    ``expected_sha256``, or else a published checksum, and a published signature; with
+    ``require_verification`` it is not run unless one of them was verified.
+    """
+    state = state or UpdaterState()
+    logger.info("Checking for BleachBit updates...")
+    installed_text = get_installed_bleachbit_version(state)
+    installed = BleachBitVersion.parse(installed_text)
+    installed_ci = get_installed_ci_build(state)
+    if installed_text:
+        logger.info(f"Currently installed BleachBit version: {installed_text}")
+    else:
+        logger.warning("Could not determine installed BleachBit version. Proceeding to check for latest.")
 
-def run_installer(filepath):
-    """Run the BleachBit installer with appropriate parameters."""
-    try:
-        logger.info(f"Running installer: {filepath}")
-        # For Windows, .exe installers can often be run directly.
-        # Adding /S for silent install if supported, common for NSIS installers.
-        # This may require admin privileges.
-        subprocess.run([filepath, "/S"], check=True)
-        logger.info("BleachBit installation/update process started.")
-        logger.info("Please follow the on-screen instructions if the installer is not silent.")
-        logger.info("You may need to grant administrator privileges.")
-        return True
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Error running installer: {e}. Try running manually with admin rights.")
-    except FileNotFoundError:
-        logger.error(f"Error: Installer {filepath} not found or command not executable.")
-    except Exception as e:
-        logger.error(f"An unexpected error occurred while running the installer: {e}")
-    return False
+    versions = get_available_versions(state, (channel,) if channel else CHANNELS, max_age)
+    logger.debug(f"Found versions: {versions}")
 
-def get_installed_bleachbit_version():
-    """Attempts to get the installed BleachBit version on Windows."""
-    # Common installation paths for BleachBit
-    possible_paths = [
-        os.path.join(os.environ.get("ProgramFiles(x86)", ""), "BleachBit", "bleachbit_console.exe"),
-        os.path.join(os.environ.get("ProgramFiles", ""), "BleachBit", "bleachbit_console.exe"),
-        os.path.join(os.environ.get("LocalAppData", ""), "Programs", "BleachBit", "bleachbit_console.exe") # User install
-    ]
-    
-    for path in possible_paths:
-        if os.path.exists(path):
-            try:
-                # BleachBit console might output version with --version
-                result = subprocess.run([path, "--version"], capture_output=True, text=True, timeout=5)
-                # Expected output: BleachBit X.Y.Z
-                match = re.search(r"BleachBit (\d+\.\d+\.\d+)", result.stdout)
-                if match:
-                    return match.group(1)
-            except Exception:
-                pass # Ignore errors if version check fails for a path
-    return None
+    if channel is None:
+        if not any(versions.get(f"{c}_url") for c in CHANNELS):
+            logger.error("Could not retrieve latest BleachBit version information.")
+            return 1
+        channel = select_version(versions, installed, installed_ci)
+        if channel is None:
+            logger.info("Update cancelled by user.")
+            return 0
+
+    url_to_download = versions.get(f"{channel}_url")
+    if not url_to_download:
+        logger.error(f"No {channel} version of BleachBit found for download.")
+        return 1
+
+    latest = BleachBitVersion.parse(versions.get(channel))
+    newer = is_update_available(installed, latest, installed_ci)
+    if check_only:
+        if newer:
+            print(f"Update available: {channel} {versions.get(channel)} (installed: {installed_text or 'unknown'})")
+            return EXIT_UPDATE_AVAILABLE
+        print(f"BleachBit is up to date ({channel} {versions.get(channel)}).")
+        return 0
+    if not newer and not force:
+        logger.info(f"BleachBit is already up to date with the latest {channel} version ({versions.get(channel)}). "
+                    "Use --force to reinstall.")
+        return 0
+
+    # Download, verify and install the chosen version
+    expected_sha256 = expected_sha256 or fetch_published_sha256(url_to_download)
+    download = download_bleachbit(url_to_download, cache=cache, mirror=mirror, expected_sha256=expected_sha256,
+                                  limiter=limiter)
+    if not download:
+        logger.error("Failed to download a valid installer.")
+        return 1
+    installer_path, sha256, signature = download
+    if require_verification and not expected_sha256 and not signature:
+        logger.error("Installer rejected: no published checksum or signature could be verified.")
+        return 1
+    if not run_installer(installer_path, sha256):
+        logger.error("Failed to run the installer.")
+        return 1
+    if latest and latest.is_ci_build:
+        _record_ci_install(state, latest)
+    logger.info("BleachBit update completed successfully.")
+    return 0
+
+def _rate_arg(text: str) -> int:
+    try:
+        return parse_rate(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
 
-def main():
-    parser = argparse.ArgumentParser(description="BleachBit Updater Script")
+def _window_arg(text: str) -> DownloadWindow:
+    try:
+        return DownloadWindow.parse(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def _log_throughput(current: float, average: float, total_bytes: int):
+    logger.info(f"Downloaded {total_bytes / 1024 ** 2:.1f} MiB: {format_rate(current)} now, "
+                f"{format_rate(average)} average")
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="BleachBit Updater - Fetches and installs BleachBit.")
+    parser.add_argument("--version", choices=CHANNELS,
+                        help="Install the latest version of this channel without prompting. Default is to prompt.")
+    parser.add_argument("--check-only", action="store_true",
+                        help=f"Only report whether an update is available (exit status {EXIT_UPDATE_AVAILABLE} "
+                             "if so, 0 if not). Checks the stable channel unless --version is given.")
+    parser.add_argument("--if-newer", action="store_true",
+                        help="Non-interactive: install the --version channel (default stable) only if it is newer.")
+    parser.add_argument("--force", action="store_true", help="Reinstall even if the installed version is current.")
+    parser.add_argument("--release-cache-ttl", type=float, default=RELEASE_CACHE_TTL, metavar="SECONDS",
+                        help="Reuse release lookups younger than this (default: %(default)s, 0 to always refresh).")
     parser.add_argument("--debug", action="store_true", help="Enable debug mode for verbose output.")
+    parser.add_argument("--metrics-json", metavar="PATH", help="Write a JSON timing report for this run to PATH.")
+    parser.add_argument("--metrics-prom", metavar="PATH",
+                        help="Write metrics for the Prometheus textfile collector to PATH (e.g. updater.prom).")
+    parser.add_argument("--no-cache", action="store_true", help="Do not use or fill the local installer cache.")
+    parser.add_argument("--cache-dir", metavar="DIR", help="Installer cache directory (default: per-user cache).")
+    parser.add_argument("--cache-size-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="Evict least recently used installers beyond this size (default: %(default)s).")
+    parser.add_argument("--mirror", metavar="URL", help="Prefer the LAN mirror at URL, e.g. http://updates-host:8765.")
+    parser.add_argument("--serve-mirror", metavar="[HOST:]PORT",
+                        help="Serve the installer cache to other hosts instead of updating this one.")
+    parser.add_argument("--mirror-allow-host", metavar="HOST", action="append", default=[],
+                        help="Extra host the mirror may download from (repeatable).")
+    parser.add_argument("--sha256", metavar="HEX", help="Expected SHA-256 of the installer, instead of the published one.")
+    parser.add_argument("--require-verification", action="store_true",
+                        help="Do not install unless a checksum or signature was verified.")
+    parser.add_argument("--limit-rate", type=_rate_arg, metavar="RATE",
+                        help="Cap download bandwidth, in bytes per second with optional K/M/G suffix (e.g. 500K).")
+    parser.add_argument("--download-window", type=_window_arg, metavar="HH:MM-HH:MM",
+                        help="Only download during this daily local-time window, e.g. 22:00-06:00; "
+                             "a download in progress pauses when it closes and resumes when it reopens.")
     args = parser.parse_args()
 
+    _add_file_handler()
+
+    global DEBUG_MODE # Declare intent to modify global DEBUG_MODE
     if args.debug:
+        DEBUG_MODE = True
         logger.setLevel(logging.DEBUG)
         logger.debug("Debug mode enabled.")
 
-    logger.info("Checking for BleachBit updates...")
-    installed_version = get_installed_bleachbit_version()
-    if installed_version:
-        logger.info(f"Currently installed BleachBit version: {installed_version}")
-    else:
-        logger.warning("Could not determine installed BleachBit version. Proceeding to check for latest.")
+    cache = None
+    if not args.no_cache or args.serve_mirror:
+        cache = InstallerCache(args.cache_dir, max_bytes=args.cache_size_mb * 1024 * 1024)
 
-    latest_versions = get_latest_bleachbit_versions()
-    ci_version, ci_url = get_latest_ci_build_url()
-    if ci_version and ci_url:
-        latest_versions["unstable"] = ci_version
-        latest_versions["unstable_url"] = ci_url
+    channel = args.version
+    if channel is None and (args.check_only or args.if_newer):
+        channel = "stable"
 
-    if not latest_versions or (not latest_versions.get("stable_url") and not latest_versions.get("beta_url")):
-        logger.error("Could not retrieve latest BleachBit version information.")
-        return
+    limiter = DownloadLimiter(args.limit_rate, args.download_window, report=_log_throughput)
 
-    # Show available versions and let user choose
-    print("\nAvailable BleachBit versions:")
-    if latest_versions.get("stable"):
-        print(f"1. Stable: {latest_versions['stable']}")
-    if latest_versions.get("beta"):
-        print(f"2. Beta: {latest_versions['beta']}")
-    if latest_versions.get("unstable"):
-        print(f"3. Unstable (CI build): {latest_versions['unstable']}")
-    print("n. Cancel update")
-
-    choice = input("\nChoose version to install (1/2/3/n): ").lower().strip()
-
-    url_to_download = None
-    chosen_version_type = None
-
-    if choice == '1' and latest_versions.get("stable_url"):
-        url_to_download = latest_versions["stable_url"]
-        chosen_version_type = "stable"
-    elif choice == '2' and latest_versions.get("beta_url"):
-        url_to_download = latest_versions["beta_url"]
-        chosen_version_type = "beta"
-    elif choice == '3' and latest_versions.get("unstable_url"):
-        url_to_download = latest_versions["unstable_url"]
-        chosen_version_type = "unstable"
-    elif choice == 'n':
-        logger.info("Update cancelled by user.")
-        return
-    else:
-        logger.error("Invalid choice or version not available.")
-        return
-
-    # Download and install the chosen version
-    installer_path = download_bleachbit(url_to_download)
-    if installer_path:
-        if run_installer(installer_path):
-            logger.info("BleachBit update completed successfully.")
-        else:
-            logger.error("Failed to run the installer.")
-    else:
-        logger.error("Failed to download the installer.")
+    if args.metrics_json or args.metrics_prom:
+        METRICS.enabled = True
+    try:
+        if args.serve_mirror:
+            serve_mirror(cache, args.serve_mirror, args.mirror_allow_host, limiter)
+            return 0
+        return check_and_update(channel, check_only=args.check_only, force=args.force,
+                                cache=cache, mirror=args.mirror, max_age=args.release_cache_ttl,
+                                expected_sha256=args.sha256, require_verification=args.require_verification,
+                                limiter=limiter)
+    finally:
+        if METRICS.enabled:
+            export_metrics(args.metrics_json, args.metrics_prom)
 
 if __name__ == "__main__":
     try:
-        main()
+        sys.exit(main())
     except KeyboardInterrupt:
         logger.info("\nUpdate cancelled by user.")
+        sys.exit(1)
     except Exception as e:
         logger.error(f"An unexpected error occurred: {e}")
         if logger.isEnabledFor(logging.DEBUG):
-            logger.exception("Detailed error traceback:")
\ No newline at end of file
+            logger.exception("Detailed error traceback:")
+        sys.exit(1)
@@ -0,0 +1,108 @@
+# bleachbit_version.py
+
+"""Comparable BleachBit version numbers.
+
+Handles stable releases (``4.6.0``), betas (``4.9.2-beta``, ``4.9.2 beta 2``,
+``4.9.2-beta2``) and unstable CI builds, which are identified by the timestamp of
+their build directory (``2023-10-27-08-55-00``). A beta sorts before the release
+it precedes. CI builds carry no release number, so they only compare with each
+other, by build time.
+"""
+
+import re
+from datetime import datetime
+from functools import total_ordering
+from typing import Optional, Tuple
+
+_RELEASE_RE = re.compile(r"(\d+(?:\.\d+)+)(?:[\s-]*(beta|b)\s*(\d*))?", re.IGNORECASE)
+_CI_BUILD_RE = re.compile(r"^\d{4}-\d{2}-\d{2}-\d{2}-\d{2}-\d{2}$")
+CI_BUILD_FORMAT = "%Y-%m-%d-%H-%M-%S"
+
+
+@total_ordering
+class BleachBitVersion:
+    """A parsed BleachBit version; see the module docstring for accepted forms."""
+
+    __slots__ = ("release", "beta", "build")
+
+    def __init__(self, release: Tuple[int, ...] = (), beta: Optional[int] = None,
+                 build: Optional[datetime] = None):
+        self.release = release
+        self.beta = beta
+        self.build = build
+
+    @classmethod
+    def parse(cls, text: Optional[str]) -> Optional["BleachBitVersion"]:
+        """Parses a version string, returning None if it is not recognised."""
+        if not text:
+            return None
+        text = text.strip()
+        if _CI_BUILD_RE.match(text):
+            return cls(build=datetime.strptime(text, CI_BUILD_FORMAT))
+        match = _RELEASE_RE.search(text)
+        if not match:
+            return None
+        release = tuple(int(part) for part in match.group(1).split("."))
+        # Pad to three components so 4.6 == 4.6.0
+        release += (0,) * (3 - len(release))
+        beta = None
+        if match.group(2):
+            beta = int(match.group(3) or 0)
+        return cls(release, beta)
+
+    @property
+    def is_ci_build(self) -> bool:
+        return self.build is not None
+
+    @property
+    def is_beta(self) -> bool:
+        return self.beta is not None
+
+    def _key(self):
+        if self.is_ci_build:
+            return (1, (), 0, 0, self.build)
+        stage = (0, self.beta) if self.is_beta else (1, 0)
+        return (0, self.release) + stage + (datetime.min,)
+
+    def __eq__(self, other):
+        if not isinstance(other, BleachBitVersion):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __lt__(self, other):
+        if not isinstance(other, BleachBitVersion):
+            return NotImplemented
+        if self.is_ci_build != other.is_ci_build:
+            raise TypeError("CI builds can only be compared with other CI builds")
+        return self._key() < other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __str__(self):
+        if self.is_ci_build:
+            return self.build.strftime(CI_BUILD_FORMAT)
+        text = ".".join(str(part) for part in self.release)
+        if self.is_beta:
+            text += f"-beta{self.beta or ''}"
+        return text
+
+    def __repr__(self):
+        return f"BleachBitVersion('{self}')"
+
+
+def is_update_available(installed: Optional[BleachBitVersion], latest: Optional[BleachBitVersion],
+                        installed_ci_build: Optional[BleachBitVersion] = None) -> bool:
+    """Returns True if ``latest`` should be installed over what is installed now.
+
+    ``installed_ci_build`` is the CI build this updater last installed, if any; it is
+    what a CI ``latest`` is compared against, since CI builds report no release number
+    that could be compared with a stable or beta version.
+    """
+    if latest is None:
+        return False
+    if latest.is_ci_build:
+        return installed_ci_build is None or latest > installed_ci_build
+    if installed is None:
+        return True
+    return latest > installed
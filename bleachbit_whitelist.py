@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+"""Decide whether a path is protected by the BleachBit whitelist.
+
+Entries come from the ``[whitelist/paths]`` section of ``bleachbit.ini`` and from
+``whitelist.json``. Literal entries are stored in a trie of path components, so a
+lookup costs one dictionary step per component however many entries there are.
+Entries with wildcards are compiled into one combined regular expression, which is
+only tried for paths below the literal prefix of some wildcard entry.
+
+A ``folder`` entry protects the path and everything below it; a ``file`` entry
+protects only the path itself.
+"""
+
+import configparser
+import json
+import os
+import re
+
+from cleaner_sizing import expand_env_vars
+
+# Trie keys that cannot clash with a path component
+_FOLDER = '\0folder'
+_FILE = '\0file'
+_PATTERNS = '\0patterns'
+
+_WILDCARD = re.compile(r'[*?[]')
+
+
+def normalize(path):
+    """Return the components of ``path`` as compared by the whitelist (case-folded on Windows)."""
+    return os.path.normcase(os.path.normpath(path)).split(os.sep)
+
+
+def translate(pattern):
+    """Translate one wildcard path component into a regex; ``*`` and ``?`` do not cross separators."""
+    sep = re.escape(os.sep)
+    out = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '*':
+            out.append(f'[^{sep}]*')
+        elif char == '?':
+            out.append(f'[^{sep}]')
+        elif char == '[' and pattern.find(']', i + 2) != -1:
+            end = pattern.find(']', i + 2)
+            body = pattern[i + 1:end].replace('\\', '\\\\')
+            if body.startswith('!'):
+                body = '^' + body[1:]
+            out.append(f'[{body}]')
+            i = end
+        else:
+            out.append(re.escape(char))
+        i += 1
+    return ''.join(out)
+
+
+def load_ini_entries(path):
+    """Read ``(path, kind)`` entries from the ``[whitelist/paths]`` section of a bleachbit.ini.
+
+    BleachBit stores each entry as a numbered pair, ``N_type = file|folder`` and ``N_path = ...``.
+    """
+    parser = configparser.RawConfigParser()
+    try:
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            parser.read_file(f)
+    except configparser.Error as e:
+        raise ValueError(f'{path}: {e}') from e
+    if not parser.has_section('whitelist/paths'):
+        return []
+    section = parser['whitelist/paths']
+    entries = []
+    for key, value in section.items():
+        number, _, field = key.partition('_')
+        if field == 'path' and value:
+            entries.append((value, section.get(f'{number}_type', 'folder')))
+    return entries
+
+
+def load_json_entries(path):
+    """Read ``(path, kind)`` entries from a whitelist.json.
+
+    Accepts a list, or an object with a ``paths`` list, whose items are either path
+    strings (treated as folders) or objects with ``path`` and optional ``type``.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get('paths', [])
+    if not isinstance(data, list):
+        raise ValueError(f'{path}: expected a list of whitelist entries')
+    entries = []
+    for item in data:
+        if isinstance(item, str):
+            entries.append((item, 'folder'))
+        elif isinstance(item, dict) and item.get('path'):
+            entries.append((item['path'], item.get('type', 'folder')))
+    return entries
+
+
+class Whitelist:
+    """Compiled set of whitelist entries; see the module docstring."""
+
+    def __init__(self, entries=()):
+        self._root = {}
+        self._patterns = []
+        self._regex = None
+        self.size = 0
+        for path, kind in entries:
+            self.add(path, kind)
+
+    @classmethod
+    def from_config_dir(cls, config_dir):
+        """Load the entries of ``bleachbit.ini`` and ``whitelist.json`` in a BleachBit config directory.
+
+        Missing files are skipped; malformed ones raise ValueError.
+        """
+        whitelist = cls()
+        for filename, loader in (('bleachbit.ini', load_ini_entries), ('whitelist.json', load_json_entries)):
+            path = os.path.join(config_dir, filename)
+            if os.path.isfile(path):
+                for entry_path, kind in loader(path):
+                    whitelist.add(entry_path, kind)
+        return whitelist
+
+    def __len__(self):
+        return self.size
+
+    def add(self, path, kind='folder'):
+        """Protect ``path``: with ``kind='folder'`` everything below it too."""
+        mark = _FILE if kind == 'file' else _FOLDER
+        components = normalize(expand_env_vars(path))
+        node = self._root
+        for i, component in enumerate(components):
+            if _WILDCARD.search(component):
+                # The literal prefix stays in the trie and gates the regex
+                node[_PATTERNS] = True
+                regex = re.escape(os.sep).join(
+                    re.escape(part) if j < i else translate(part) for j, part in enumerate(components))
+                if mark is _FOLDER:
+                    regex += f'(?:{re.escape(os.sep)}.*)?'
+                self._patterns.append(regex)
+                self._regex = None
+                break
+            node = node.setdefault(component, {})
+        else:
+            node[mark] = True
+        self.size += 1
+
+    def _compiled(self):
+        regex = self._regex
+        if regex is None:
+            # Compiling twice from two threads is harmless
+            regex = self._regex = re.compile('|'.join(f'(?:{p})' for p in self._patterns), re.DOTALL)
+        return regex
+
+    def is_protected(self, path):
+        """Return True if ``path`` is whitelisted itself or lies below a whitelisted folder.
+
+        Suitable as the ``prune`` hook of :func:`cleaner_sizing.walk_size`.
+        """
+        components = normalize(path)
+        node = self._root
+        patterns = False
+        for component in components:
+            if _FOLDER in node:
+                return True
+            patterns = patterns or _PATTERNS in node
+            node = node.get(component)
+            if node is None:
+                break
+        else:
+            if _FOLDER in node or _FILE in node:
+                return True
+            patterns = patterns or _PATTERNS in node
+        if not patterns:
+            return False
+        return self._compiled().fullmatch(os.sep.join(components)) is not None
@@ -0,0 +1,224 @@
+import os
+import queue
+import threading
+import tkinter as tk
+from tkinter import ttk
+from cleaner_metadata import CleanerMetadataCache, iter_cleaner_files
+from cleaner_sizing import SizeEstimator, format_size
+
+# Rows are inserted into the Treeview a page at a time, as the user scrolls
+PAGE_SIZE = 200
+# Send discovered files to the GUI thread in batches of this size
+LISTING_BATCH = 500
+# How often the GUI thread drains the worker queues
+POLL_INTERVAL_MS = 50
+
+
+class CleanerBrowser:
+    """Window listing the installed cleaners with their labels, versions and options.
+
+    The directory listing and XML parsing run on background threads and are handed
+    to the GUI thread through queues, so the window opens immediately regardless of
+    how many cleaners are installed. Rows are only created when they are about to
+    scroll into view, and a cleaner's options are only added when it is expanded.
+    Expanding a cleaner also starts sizing its options on a worker pool; partial
+    totals fill the Reclaimable column while the walk runs.
+    """
+
+    columns = ('label', 'version', 'options', 'reclaimable', 'description')
+
+    def __init__(self, parent, cleaners_dir, metadata_cache=None, size_cache=None, whitelist=None):
+        self.cleaners_dir = cleaners_dir
+        self.metadata_cache = metadata_cache or CleanerMetadataCache()
+        # Whitelisted files and folders would not be deleted, so they are not counted
+        self.estimator = SizeEstimator(cache=size_cache, prune=whitelist.is_protected if whitelist else None)
+
+        self._closed = threading.Event()
+        self._listed_paths = queue.Queue()
+        self._parse_requests = queue.Queue()
+        self._parsed = queue.Queue()
+        self._sized = queue.Queue()
+
+        self._pending_paths = []
+        self._listing_done = False
+        self._total = 0
+        self._rows_wanted = PAGE_SIZE
+        self._item_paths = {}
+        self._item_metadata = {}
+        self._populated = set()
+        self._option_sizes = {}
+
+        self.window = tk.Toplevel(parent)
+        self.window.title('Cleaners')
+        self.window.geometry('900x500')
+        self.window.protocol('WM_DELETE_WINDOW', self.close)
+        self.create_widgets()
+
+        threading.Thread(target=self._list_files, daemon=True).start()
+        threading.Thread(target=self._parse_worker, daemon=True).start()
+        self._poll()
+
+    def create_widgets(self):
+        frame = ttk.Frame(self.window)
+        frame.pack(fill='both', expand=True, padx=5, pady=5)
+
+        self.tree = ttk.Treeview(frame, columns=self.columns)
+        self.tree.heading('#0', text='Cleaner / Option')
+        self.tree.heading('label', text='Label')
+        self.tree.heading('version', text='Version')
+        self.tree.heading('options', text='Options')
+        self.tree.heading('reclaimable', text='Reclaimable')
+        self.tree.heading('description', text='Description')
+        self.tree.column('#0', width=180)
+        self.tree.column('label', width=160)
+        self.tree.column('version', width=60, anchor='center')
+        self.tree.column('options', width=60, anchor='center')
+        self.tree.column('reclaimable', width=110, anchor='e')
+        self.tree.column('description', width=300)
+
+        scrollbar = ttk.Scrollbar(frame, orient='vertical', command=self.tree.yview)
+        self.tree.configure(yscrollcommand=lambda first, last: self._on_scroll(scrollbar, first, last))
+        scrollbar.pack(side='right', fill='y')
+        self.tree.pack(side='left', fill='both', expand=True)
+        self.tree.bind('<<TreeviewOpen>>', self._on_open)
+
+        self.status_var = tk.StringVar(value=f'Scanning {self.cleaners_dir}...')
+        ttk.Label(self.window, textvariable=self.status_var, anchor='w').pack(fill='x', padx=5)
+        ttk.Button(self.window, text='Close', command=self.close).pack(pady=5)
+
+    def close(self):
+        """Stop the background workers and close the window."""
+        self._closed.set()
+        self.estimator.shutdown()
+        self.window.destroy()
+
+    # Background threads: never touch Tk objects here
+
+    def _list_files(self):
+        batch = []
+        for path in iter_cleaner_files(self.cleaners_dir):
+            if self._closed.is_set():
+                return
+            batch.append(path)
+            if len(batch) >= LISTING_BATCH:
+                self._listed_paths.put(batch)
+                batch = []
+        self._listed_paths.put(batch)
+        self._listed_paths.put(None)
+
+    def _parse_worker(self):
+        while not self._closed.is_set():
+            try:
+                item, path = self._parse_requests.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            self._parsed.put((item, self.metadata_cache.get(path)))
+
+    # GUI thread
+
+    def _poll(self):
+        if self._closed.is_set():
+            return
+
+        while True:
+            try:
+                batch = self._listed_paths.get_nowait()
+            except queue.Empty:
+                break
+            if batch is None:
+                self._listing_done = True
+            else:
+                self._pending_paths.extend(batch)
+                self._total += len(batch)
+
+        self._insert_rows()
+
+        while True:
+            try:
+                item, metadata = self._parsed.get_nowait()
+            except queue.Empty:
+                break
+            self._apply_metadata(item, metadata)
+
+        while True:
+            try:
+                item, files, nbytes, done = self._sized.get_nowait()
+            except queue.Empty:
+                break
+            self._apply_size(item, files, nbytes, done)
+
+        self._update_status()
+        self.window.after(POLL_INTERVAL_MS, self._poll)
+
+    def _insert_rows(self):
+        inserted = len(self._item_paths)
+        if inserted >= self._rows_wanted or not self._pending_paths:
+            return
+        count = min(self._rows_wanted - inserted, len(self._pending_paths))
+        paths, self._pending_paths = self._pending_paths[:count], self._pending_paths[count:]
+        for path in paths:
+            item = self.tree.insert('', 'end', text=os.path.basename(path), values=('Loading...', '', '', '', ''))
+            # Placeholder child so the row can be expanded before its options are known
+            self.tree.insert(item, 'end', text='Loading...')
+            self._item_paths[item] = path
+            self._parse_requests.put((item, path))
+
+    def _on_scroll(self, scrollbar, first, last):
+        scrollbar.set(first, last)
+        # Ask for another page once the user nears the end of the rows created so far
+        if float(last) > 0.9 and self._rows_wanted <= len(self._item_paths):
+            self._rows_wanted += PAGE_SIZE
+
+    def _apply_metadata(self, item, metadata):
+        if not self.tree.exists(item):
+            return
+        self._item_metadata[item] = metadata
+        description = metadata['description']
+        if 'error' in metadata:
+            description = f"Parse error: {metadata['error']}"
+        self.tree.item(item, values=(metadata['label'], metadata['version'], len(metadata['options']), '', description))
+        if self.tree.item(item, 'open'):
+            self._populate_options(item)
+
+    def _on_open(self, event):
+        item = self.tree.focus()
+        if item in self._item_metadata:
+            self._populate_options(item)
+
+    def _populate_options(self, item):
+        if item in self._populated:
+            return
+        self._populated.add(item)
+        self.tree.delete(*self.tree.get_children(item))
+        path = self._item_paths[item]
+        sizes = self._option_sizes[item] = {}
+        for option in self._item_metadata[item]['options']:
+            option_item = self.tree.insert(item, 'end', text=option['id'],
+                                           values=(option['label'], '', '', 'Sizing...', option['description']))
+            sizes[option_item] = (0, False)
+            self.estimator.estimate(
+                (path, option['id']), option['actions'],
+                lambda files, nbytes, done, option_item=option_item:
+                    self._sized.put((option_item, files, nbytes, done)))
+        self._update_cleaner_size(item)
+
+    def _apply_size(self, option_item, files, nbytes, done):
+        if not self.tree.exists(option_item):
+            return
+        text = format_size(nbytes) if done else f'{format_size(nbytes)}...'
+        self.tree.set(option_item, 'reclaimable', text)
+        parent = self.tree.parent(option_item)
+        self._option_sizes[parent][option_item] = (nbytes, done)
+        self._update_cleaner_size(parent)
+
+    def _update_cleaner_size(self, item):
+        sizes = self._option_sizes[item].values()
+        text = format_size(sum(nbytes for nbytes, _ in sizes))
+        if not all(done for _, done in sizes):
+            text += '...'
+        self.tree.set(item, 'reclaimable', text)
+
+    def _update_status(self):
+        shown = len(self._item_paths)
+        suffix = '' if self._listing_done else ' (scanning...)'
+        self.status_var.set(f'Showing {shown} of {self._total} cleaners{suffix}')
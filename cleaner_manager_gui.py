@@ -2,17 +2,26 @@ import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import os
 import shutil
-import subprocess
-from bleachbit_settings_manager import BleachBitSettingsManager
 
 class CleanerManagerGUI:
     def __init__(self, root):
         self.root = root
         self.root.title('BleachBit Cleaner Manager')
         self.debug_mode = tk.BooleanVar()
-        self.settings_manager = BleachBitSettingsManager()
+        # Created on first use so the window appears without importing or touching anything else
+        self._settings_manager = None
+        self.metadata_cache = None
+        self.size_cache = None
+        self.whitelist = None
         self.create_widgets()
 
+    @property
+    def settings_manager(self):
+        if self._settings_manager is None:
+            from bleachbit_settings_manager import BleachBitSettingsManager
+            self._settings_manager = BleachBitSettingsManager()
+        return self._settings_manager
+
     def create_widgets(self):
         self.add_button = tk.Button(self.root, text='Add Cleaner', command=self.add_cleaner)
         self.add_button.pack(pady=10)
@@ -56,6 +65,9 @@ class CleanerManagerGUI:
         restore_button = tk.Button(settings_frame, text='Restore Backup', command=self.restore_backup)
         restore_button.pack(side='left', padx=5)
 
+        self.verify_button = tk.Button(settings_frame, text='Verify Backups', command=self.verify_backups)
+        self.verify_button.pack(side='left', padx=5)
+
         # Import & Export
         export_button = tk.Button(settings_frame, text='Export Settings', command=self.export_settings)
         export_button.pack(side='right', padx=5)
@@ -79,12 +91,32 @@ class CleanerManagerGUI:
 
     def list_cleaners(self):
         cleaners_dir = os.path.join(os.getenv('APPDATA'), 'BleachBit', 'cleaners')
-        cleaners = os.listdir(cleaners_dir) if os.path.exists(cleaners_dir) else []
-        messagebox.showinfo('Cleaners', '\n'.join(cleaners) if cleaners else 'No cleaners found.')
+        if not os.path.exists(cleaners_dir):
+            messagebox.showinfo('Cleaners', 'No cleaners found.')
+            return
+        from cleaner_browser import CleanerBrowser
+        if self.metadata_cache is None:
+            from cleaner_metadata import CleanerMetadataCache
+            from cleaner_sizing import SizeCache
+            # Shared between browser windows so reopening the list does not re-parse unchanged files
+            self.metadata_cache = CleanerMetadataCache()
+            self.size_cache = SizeCache()
+            self.whitelist = self.load_whitelist()
+        CleanerBrowser(self.root, cleaners_dir, self.metadata_cache, self.size_cache, self.whitelist)
+
+    def load_whitelist(self):
+        """Loads BleachBit's whitelist so sizing skips protected paths; None if it cannot be read."""
+        from bleachbit_whitelist import Whitelist
+        try:
+            return Whitelist.from_config_dir(self.settings_manager.config_dir)
+        except (OSError, ValueError) as e:
+            messagebox.showwarning('Whitelist', f'Could not read the BleachBit whitelist, sizes include whitelisted files:\n{e}')
+            return None
 
     def run_bleachbit_updater(self):
         """Runs the BleachBit updater script."""
         import threading
+        import subprocess
         import sys
         current_dir = os.path.dirname(os.path.abspath(__file__))
         updater_script_path = os.path.join(current_dir, "bleachbit_updater.py")
@@ -220,6 +252,46 @@ class CleanerManagerGUI:
         except Exception as e:
             messagebox.showerror('Error', f'Failed to list backups: {e}')
 
+    def verify_backups(self):
+        """Rehash all backups against their checksum manifests on a background thread."""
+        import threading
+        result = {}
+
+        def scrub():
+            try:
+                result['reports'] = self.settings_manager.scrub_backups()
+            except Exception as e:
+                result['error'] = e
+
+        def poll():
+            if thread.is_alive():
+                self.root.after(100, poll)
+                return
+            self.verify_button.config(state='normal')
+            if 'error' in result:
+                messagebox.showerror('Error', f"Failed to verify backups: {result['error']}")
+                return
+            reports = result['reports']
+            if not reports:
+                messagebox.showinfo('Verify Backups', 'No backups available')
+                return
+            lines = []
+            for report in reports:
+                if not report['has_manifest']:
+                    status = 'no checksums recorded'
+                elif report['ok']:
+                    status = f"OK ({report['checked']} files)"
+                else:
+                    status = f"{len(report['corrupted'])} corrupted, {len(report['missing'])} missing"
+                lines.append(f"{report['name']}: {status}")
+            show = messagebox.showinfo if all(report['ok'] for report in reports) else messagebox.showwarning
+            show('Verify Backups', '\n'.join(lines))
+
+        self.verify_button.config(state='disabled')
+        thread = threading.Thread(target=scrub, daemon=True)
+        thread.start()
+        poll()
+
     def export_settings(self):
         """Export BleachBit settings to a file."""
         try:
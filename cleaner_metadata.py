@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+"""Parsing and caching of CleanerML metadata (labels, versions, options and actions)."""
+
+import os
+import threading
+import xml.etree.ElementTree as ET
+
+
+def _text(element, tag):
+    child = element.find(tag)
+    if child is None or child.text is None:
+        return ''
+    return ' '.join(child.text.split())
+
+
+def parse_cleaner(path):
+    """Parse a CleanerML file into a plain dict.
+
+    Returns ``{'id', 'label', 'description', 'version', 'options'}`` where each
+    option is ``{'id', 'label', 'description', 'actions'}`` and each action is
+    the dict of its XML attributes.
+    """
+    root = ET.parse(path).getroot()
+    options = []
+    for option in root.iter('option'):
+        options.append({
+            'id': option.get('id', ''),
+            'label': _text(option, 'label'),
+            'description': _text(option, 'description'),
+            'actions': [dict(action.attrib) for action in option.iter('action')]
+        })
+    return {
+        'id': root.get('id', ''),
+        'label': _text(root, 'label'),
+        'description': _text(root, 'description'),
+        'version': _text(root, 'version'),
+        'options': options
+    }
+
+
+def iter_cleaner_files(cleaners_dir):
+    """Yield the paths of the XML files in a cleaners directory, in directory order."""
+    try:
+        with os.scandir(cleaners_dir) as entries:
+            for entry in entries:
+                if entry.name.lower().endswith('.xml') and entry.is_file():
+                    yield entry.path
+    except FileNotFoundError:
+        return
+
+
+class CleanerMetadataCache:
+    """Thread-safe cache of parsed cleaner metadata, invalidated by file mtime."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """Return the metadata for ``path``, parsing it only if it changed since the last call.
+
+        Files that fail to parse yield a dict with an ``error`` key instead of raising,
+        so one broken cleaner does not stop a directory listing.
+        """
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError as e:
+            return {'id': '', 'label': '', 'description': '', 'version': '', 'options': [], 'error': str(e)}
+
+        with self._lock:
+            cached = self._entries.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        try:
+            metadata = parse_cleaner(path)
+        except (ET.ParseError, OSError) as e:
+            metadata = {'id': '', 'label': '', 'description': '', 'version': '', 'options': [], 'error': str(e)}
+
+        with self._lock:
+            self._entries[path] = (mtime, metadata)
+        return metadata
+
+    def invalidate(self, path=None):
+        """Drop one cached entry, or all of them when ``path`` is None."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(path, None)
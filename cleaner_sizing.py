@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+
+"""Estimate how much space a cleaner option would free by walking its action paths."""
+
+import glob
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Seconds a computed size stays valid
+DEFAULT_TTL = 300
+# Minimum seconds between partial-total callbacks for one option
+PROGRESS_INTERVAL = 0.25
+
+_ENV_VAR = re.compile(r'%([^%]+)%')
+
+
+def expand_env_vars(path, environ=None):
+    """Expand Windows-style ``%Var%`` references, case-insensitively.
+
+    Unknown variables are left in place so the resulting path simply does not exist.
+    """
+    if environ is None:
+        environ = os.environ
+    lookup = {key.lower(): value for key, value in environ.items()}
+    return _ENV_VAR.sub(lambda m: lookup.get(m.group(1).lower(), m.group(0)), path)
+
+
+def expand_action_paths(action, environ=None):
+    """Resolve a CleanerML action to ``(path, recurse)`` pairs that exist on this machine."""
+    raw_path = action.get('path')
+    if not raw_path:
+        return []
+    path = expand_env_vars(raw_path, environ).replace('\\', os.sep)
+    search = action.get('search', '')
+    recurse = action.get('recurse', '').lower() == 'true' or search.startswith('walk')
+
+    if glob.has_magic(path):
+        matches = glob.glob(path)
+    elif os.path.lexists(path):
+        matches = [path]
+    else:
+        matches = []
+    return [(match, recurse) for match in matches]
+
+
+def walk_size(top, cancel=None, report=None, prune=None):
+    """Return ``(files, bytes)`` under ``top`` without following symlinks.
+
+    ``report(files, bytes)`` receives deltas as directories are finished, ``cancel``
+    is a threading.Event checked between directories and ``prune(path)`` may return
+    True to skip a file, or a directory and everything below it (e.g.
+    :meth:`bleachbit_whitelist.Whitelist.is_protected`).
+    """
+    total_files = total_bytes = 0
+    files = nbytes = 0
+    stack = [top]
+    while stack:
+        if cancel is not None and cancel.is_set():
+            break
+        directory = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if prune is None or not prune(entry.path):
+                            stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        if prune is not None and prune(entry.path):
+                            continue
+                        files += 1
+                        nbytes += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+        if report is not None and files:
+            report(files, nbytes)
+        total_files += files
+        total_bytes += nbytes
+        files = nbytes = 0
+    return total_files, total_bytes
+
+
+def literal_prefix(path):
+    """Return the part of ``path`` before its first wildcard component, or ``path`` itself."""
+    parts = path.split(os.sep)
+    for i, part in enumerate(parts):
+        if glob.has_magic(part):
+            return os.sep.join(parts[:i]) or os.sep
+    return path
+
+
+def option_targets(actions, cancel=None):
+    """Resolve the delete actions of one option to ``{path: (recurse, directory)}``.
+
+    ``directory`` is the top directory the action deletes from: the literal prefix of
+    a wildcard path, otherwise the path itself or, for a file, its parent. Paths are
+    normalised so two actions matching the same file count it once, and a target
+    below another recursive target of the option is dropped, since that walk counts it.
+    """
+    targets = {}
+    for action in actions:
+        if cancel is not None and cancel.is_set():
+            break
+        if action.get('command', 'delete') != 'delete':
+            continue
+        matches = expand_action_paths(action)
+        if not matches:
+            continue
+        pattern = expand_env_vars(action['path']).replace('\\', os.sep)
+        prefix = literal_prefix(pattern)
+        for path, recurse in matches:
+            key_path = os.path.normcase(os.path.normpath(path))
+            if key_path in targets:
+                recurse = recurse or targets[key_path][0]
+                directory = targets[key_path][1]
+            elif prefix != pattern:
+                directory = os.path.normcase(os.path.normpath(prefix))
+            elif os.path.isdir(key_path) and not os.path.islink(key_path):
+                directory = key_path
+            else:
+                directory = os.path.dirname(key_path)
+            targets[key_path] = (recurse, directory)
+
+    # Sorting by components puts every path right after the directories containing it
+    covering = None
+    for path in sorted(targets, key=lambda p: p.split(os.sep)):
+        if covering is not None and path.startswith(covering):
+            del targets[path]
+        elif targets[path][0] and os.path.isdir(path) and not os.path.islink(path):
+            covering = path.rstrip(os.sep) + os.sep
+    return targets
+
+
+def size_target(path, recurse, cancel=None, report=None, prune=None):
+    """Return ``(files, bytes)`` a delete action on ``path`` would free; arguments as in walk_size.
+
+    Raises OSError if ``path`` disappears.
+    """
+    if prune is not None and prune(path):
+        return 0, 0
+    if os.path.isdir(path) and not os.path.islink(path):
+        return walk_size(path, cancel, report, prune) if recurse else (0, 0)
+    size = os.lstat(path).st_size
+    if report is not None:
+        report(1, size)
+    return 1, size
+
+
+def format_size(nbytes):
+    """Format a byte count for display, e.g. ``1.5 GB``."""
+    if nbytes < 1024:
+        return f'{nbytes} B'
+    size = float(nbytes)
+    for unit in ('KB', 'MB', 'GB', 'TB'):
+        size /= 1024
+        if size < 1024 or unit == 'TB':
+            break
+    return f'{size:.1f} {unit}'
+
+
+class SizeCache:
+    """Computed option sizes with a time-to-live, shared between estimators."""
+
+    def __init__(self, ttl=DEFAULT_TTL):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+        return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+
+
+class _OptionTotal:
+    """Accumulates deltas from the walks of one option and throttles progress callbacks."""
+
+    def __init__(self, key, pending, callback):
+        self.key = key
+        self.pending = pending
+        self.callback = callback
+        self.files = 0
+        self.bytes = 0
+        self.last_report = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, files, nbytes):
+        with self.lock:
+            self.files += files
+            self.bytes += nbytes
+            now = time.monotonic()
+            if now - self.last_report < PROGRESS_INTERVAL:
+                return
+            self.last_report = now
+            snapshot = (self.files, self.bytes)
+        self.callback(snapshot[0], snapshot[1], False)
+
+    def finish_one(self):
+        with self.lock:
+            self.pending -= 1
+            if self.pending:
+                return None
+            return self.files, self.bytes
+
+
+class SizeEstimator:
+    """Sizes cleaner options on a worker pool.
+
+    ``callback(files, bytes, done)`` is invoked from worker threads with partial
+    totals while the walk runs and once more with ``done=True``. Call
+    :meth:`shutdown` to cancel outstanding walks.
+    """
+
+    def __init__(self, cache=None, max_workers=4, prune=None):
+        self.cache = cache if cache is not None else SizeCache()
+        self.prune = prune
+        self._cancel = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='cleaner-sizing')
+
+    def estimate(self, key, actions, callback):
+        """Start sizing one option; ``key`` identifies it in the cache."""
+        cached = self.cache.get(key)
+        if cached is not None:
+            callback(cached[0], cached[1], True)
+            return
+
+        # Resolving globs touches the filesystem too, so it happens on the pool
+        self._executor.submit(self._start, key, actions, callback)
+
+    def _start(self, key, actions, callback):
+        targets = option_targets(actions, self._cancel)
+        if self._cancel.is_set():
+            return
+        if not targets:
+            self.cache.put(key, (0, 0))
+            callback(0, 0, True)
+            return
+
+        total = _OptionTotal(key, len(targets), callback)
+        for path, (recurse, _) in targets.items():
+            try:
+                self._executor.submit(self._size_target, total, path, recurse)
+            except RuntimeError:
+                # Executor shut down while we were queueing work
+                return
+
+    def _size_target(self, total, path, recurse):
+        try:
+            if not self._cancel.is_set():
+                size_target(path, recurse, self._cancel, total.add, self.prune)
+        except OSError:
+            pass
+        finally:
+            result = total.finish_one()
+        if result is not None and not self._cancel.is_set():
+            self.cache.put(total.key, result)
+            total.callback(result[0], result[1], True)
+
+    def shutdown(self):
+        """Cancel running walks and drop queued ones."""
+        self._cancel.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,211 @@
+# download_limiter.py
+
+"""Bandwidth cap and time window for installer downloads.
+
+``TokenBucket`` smooths the download to a bytes-per-second cap: every chunk takes
+tokens, tokens refill continuously, and a chunk that overdraws the bucket sleeps
+off the debt. The bucket starts empty, so the average never exceeds the cap, and
+it holds at most a quarter of a second's worth, so bursts stay short.
+``DownloadWindow`` is a daily local-time window outside which a download pauses;
+``DownloadLimiter`` combines both with a throughput meter.
+"""
+
+import re
+import threading
+import time
+from datetime import datetime, time as dtime, timedelta
+from typing import Callable, Optional
+
+# Seconds between throughput reports
+REPORT_INTERVAL = 10.0
+# Seconds between checks of the time window while downloading
+WINDOW_CHECK_INTERVAL = 1.0
+# Longest single sleep while waiting for the window, so the wait stays interruptible
+MAX_WAIT_SLICE = 60.0
+
+_RATE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kmg]?)(?:i?b)?(?:/s)?\s*$", re.IGNORECASE)
+_WINDOW_RE = re.compile(r"^\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*$")
+_UNITS = {"": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3}
+
+
+def parse_rate(text: str) -> int:
+    """Parses a rate such as ``500K``, ``2M`` or ``100000`` into bytes per second (K = 1024, as in curl)."""
+    match = _RATE_RE.match(text)
+    if not match:
+        raise ValueError(f"Invalid rate: {text!r}")
+    rate = int(float(match.group(1)) * _UNITS[match.group(2).lower()])
+    if rate <= 0:
+        raise ValueError(f"Rate must be positive: {text!r}")
+    return rate
+
+
+def format_rate(bytes_per_second: float) -> str:
+    for unit in ("B/s", "KiB/s", "MiB/s"):
+        if bytes_per_second < 1024 or unit == "MiB/s":
+            return f"{bytes_per_second:.1f} {unit}"
+        bytes_per_second /= 1024
+
+
+class TokenBucket:
+    """Token bucket refilled at ``rate`` bytes per second, holding at most ``burst`` tokens.
+
+    Safe to share between threads: each caller reserves its tokens under a lock and
+    sleeps off its own share of the debt, so concurrent downloads split the cap.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.rate = float(rate)
+        self.burst = burst if burst is not None else max(self.rate / 4, 1.0)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = 0.0
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def consume(self, amount: int) -> float:
+        """Takes ``amount`` tokens, sleeping off any shortfall; returns the seconds slept."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            delay = -self._tokens / self.rate
+        self._sleep(delay)
+        return delay
+
+
+class DownloadWindow:
+    """Daily window such as ``22:00-06:00`` in local time; it may wrap past midnight."""
+
+    def __init__(self, start: dtime, end: dtime):
+        self.start = start
+        self.end = end
+
+    @classmethod
+    def parse(cls, text: str) -> "DownloadWindow":
+        match = _WINDOW_RE.match(text)
+        if not match:
+            raise ValueError(f"Invalid window {text!r}, expected HH:MM-HH:MM")
+        hours_start, minutes_start, hours_end, minutes_end = (int(part) for part in match.groups())
+        try:
+            return cls(dtime(hours_start, minutes_start), dtime(hours_end, minutes_end))
+        except ValueError as e:
+            raise ValueError(f"Invalid window {text!r}: {e}") from e
+
+    def is_open(self, now: Optional[datetime] = None) -> bool:
+        current = (now or datetime.now()).time()
+        if self.start == self.end:
+            return True
+        if self.start < self.end:
+            return self.start <= current < self.end
+        return current >= self.start or current < self.end
+
+    def seconds_until_open(self, now: Optional[datetime] = None) -> float:
+        now = now or datetime.now()
+        if self.is_open(now):
+            return 0.0
+        opens = datetime.combine(now.date(), self.start)
+        if opens <= now:
+            opens += timedelta(days=1)
+        return (opens - now).total_seconds()
+
+    def __str__(self):
+        return f"{self.start:%H:%M}-{self.end:%H:%M}"
+
+
+class DownloadLimiter:
+    """Applies an optional rate cap and time window to one download and reports its throughput.
+
+    ``report(current, average, total_bytes)`` is called every ``report_interval`` seconds
+    with the throughput since the last report and since the start, in bytes per second.
+    A limiter tracks a single download; concurrent downloads each take their own from
+    :meth:`new_download`, and only the thread-safe ``bucket`` is shared between them.
+    """
+
+    def __init__(self, rate: Optional[int] = None, window: Optional[DownloadWindow] = None,
+                 report: Optional[Callable[[float, float, int], None]] = None,
+                 report_interval: float = REPORT_INTERVAL,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep,
+                 bucket: Optional[TokenBucket] = None):
+        self.rate = rate
+        self.window = window
+        if bucket is None and rate:
+            bucket = TokenBucket(rate, clock=clock, sleep=sleep)
+        self.bucket = bucket
+        self.report = report
+        self.report_interval = report_interval
+        self.throttled_seconds = 0.0
+        self.paused_seconds = 0.0
+        self.total_bytes = 0
+        self._clock = clock
+        self._sleep = sleep
+        self._started = None
+        self._last_report = None
+        self._bytes_at_report = 0
+        self._window_checked = float("-inf")
+
+    def new_download(self) -> "DownloadLimiter":
+        """Returns a limiter for another download with the same settings, sharing this one's rate cap."""
+        return DownloadLimiter(self.rate, self.window, self.report, self.report_interval,
+                               clock=self._clock, sleep=self._sleep, bucket=self.bucket)
+
+    def chunk_size(self, default: int) -> int:
+        """Read size for the download loop: about an eighth of a second at the cap, so pacing is smooth."""
+        if not self.rate:
+            return default
+        return max(4096, min(default, self.rate // 8))
+
+    def start(self):
+        self._started = self._last_report = self._clock()
+        self._bytes_at_report = self.total_bytes
+
+    def throttle(self, nbytes: int):
+        """Accounts for ``nbytes`` just received, sleeping as needed to stay under the cap."""
+        if self._started is None:
+            self.start()
+        self.total_bytes += nbytes
+        if self.bucket:
+            self.throttled_seconds += self.bucket.consume(nbytes)
+        now = self._clock()
+        if self.report and now - self._last_report >= self.report_interval:
+            current = (self.total_bytes - self._bytes_at_report) / (now - self._last_report)
+            self.report(current, self.average(now), self.total_bytes)
+            self._last_report = now
+            self._bytes_at_report = self.total_bytes
+
+    def average(self, now: Optional[float] = None) -> float:
+        """Average throughput since the download started, excluding time spent paused."""
+        if self._started is None:
+            return 0.0
+        elapsed = (now if now is not None else self._clock()) - self._started - self.paused_seconds
+        return self.total_bytes / elapsed if elapsed > 0 else 0.0
+
+    def should_pause(self) -> bool:
+        """True once the time window has closed; checked at most every WINDOW_CHECK_INTERVAL seconds."""
+        if not self.window:
+            return False
+        now = self._clock()
+        if now - self._window_checked < WINDOW_CHECK_INTERVAL:
+            return False
+        self._window_checked = now
+        return not self.window.is_open()
+
+    def wait_for_window(self) -> float:
+        """Sleeps until the time window opens; returns the seconds waited."""
+        waited = 0.0
+        while self.window:
+            remaining = self.window.seconds_until_open()
+            if remaining <= 0:
+                break
+            step = min(remaining, MAX_WAIT_SLICE)
+            self._sleep(step)
+            waited += step
+        self.paused_seconds += waited
+        if waited and self._started is not None:
+            # The next throughput report covers only the time since the download resumed
+            self._last_report = self._clock()
+            self._bytes_at_report = self.total_bytes
+        return waited
@@ -0,0 +1,255 @@
+# installer_cache.py
+
+"""Content-addressed cache of downloaded installers.
+
+Installers are stored once under ``objects/<sha256[:2]>/<sha256>`` and indexed by
+URL plus the server's validator (ETag or Last-Modified). The cache is bounded by
+size and evicts the least recently used entries first. Several processes may share
+a cache directory (e.g. ``--serve-mirror`` and a normal update): every change
+re-reads ``index.json`` while holding an exclusive lock on ``index.lock``. ``installer_mirror``
+exposes the cache over HTTP so one host downloads an installer and the rest of
+the fleet pulls it from the LAN.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def default_cache_dir() -> str:
+    """Returns the per-user cache directory for this project."""
+    if os.name == 'nt':
+        base = os.environ.get("LocalAppData") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "bleachbit_clean_sweep")
+
+
+def _lock_file(f):
+    if os.name == "nt":
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                # LK_LOCK gives up after about ten seconds; keep waiting
+                continue
+    else:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+
+def _unlock_file(f):
+    if os.name == "nt":
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class InstallerCache:
+    """Size-bounded, content-addressed store of installer files."""
+
+    def __init__(self, root: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root or os.path.join(default_cache_dir(), "installers")
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(self.root, "index.json")
+        self.lock_path = os.path.join(self.root, "index.lock")
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, dict]] = None
+
+    @staticmethod
+    def make_key(url: str, validator: str = "") -> str:
+        return hashlib.sha256(f"{url}\n{validator}".encode("utf-8")).hexdigest()
+
+    def object_path(self, sha256: str) -> str:
+        return os.path.join(self.root, "objects", sha256[:2], sha256)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Holds the cache against other threads and processes, with the index freshly read.
+
+        Not reentrant: the methods that take it do not call each other.
+        """
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            with open(self.lock_path, "a+b") as lock_file:
+                _lock_file(lock_file)
+                try:
+                    # Another process may have changed the index since it was last read
+                    self._index = None
+                    yield
+                finally:
+                    self._index = None
+                    _unlock_file(lock_file)
+
+    def _entries(self) -> Dict[str, dict]:
+        if self._index is None:
+            try:
+                with open(self.index_path, "r") as f:
+                    self._index = json.load(f).get("entries", {})
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def _save(self):
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".index-")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"entries": self._entries()}, f, indent=4)
+        os.replace(tmp_path, self.index_path)
+
+    def _touch(self, key: str, entry: dict) -> Optional[dict]:
+        if not os.path.exists(self.object_path(entry["sha256"])):
+            del self._entries()[key]
+            self._save()
+            return None
+        entry["last_used"] = time.time()
+        self._save()
+        return dict(entry)
+
+    def lookup(self, url: str, validator: str = "") -> Optional[dict]:
+        """Returns the entry for ``url`` at ``validator``, or None on a miss."""
+        with self._locked():
+            key = self.make_key(url, validator)
+            entry = self._entries().get(key)
+            return self._touch(key, entry) if entry else None
+
+    def lookup_url(self, url: str) -> Optional[dict]:
+        """Returns the most recently stored entry for ``url`` regardless of validator."""
+        with self._locked():
+            candidates = [(e["stored"], k, e) for k, e in self._entries().items() if e["url"] == url]
+            if not candidates:
+                return None
+            _, key, entry = max(candidates)
+            return self._touch(key, entry)
+
+    def lookup_sha256(self, sha256: str) -> Optional[dict]:
+        with self._locked():
+            for key, entry in self._entries().items():
+                if entry["sha256"] == sha256:
+                    return self._touch(key, entry)
+        return None
+
+    def store(self, url: str, validator: str, src_path: str, sha256: Optional[str] = None) -> dict:
+        """Adds ``src_path`` to the cache, hashing it unless ``sha256`` is already known."""
+        if sha256 is None:
+            sha256 = sha256_file(src_path)
+        size = os.path.getsize(src_path)
+        object_path = self.object_path(sha256)
+        with self._locked():
+            if not os.path.exists(object_path):
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                tmp_path = f"{object_path}.{os.getpid()}.tmp"
+                shutil.copyfile(src_path, tmp_path)
+                os.replace(tmp_path, object_path)
+            now = time.time()
+            entry = {
+                "url": url,
+                "validator": validator,
+                "sha256": sha256,
+                "size": size,
+                "filename": url.rstrip("/").split("/")[-1],
+                "stored": now,
+                "last_used": now,
+            }
+            self._entries()[self.make_key(url, validator)] = entry
+            self._evict()
+            self._save()
+        return dict(entry)
+
+    def discard(self, sha256: str):
+        """Removes an installer and every entry pointing to it, e.g. after it failed verification."""
+        with self._locked():
+            entries = self._entries()
+            for key in [k for k, e in entries.items() if e["sha256"] == sha256]:
+                del entries[key]
+            try:
+                os.remove(self.object_path(sha256))
+            except OSError:
+                pass
+            self._save()
+
+    def _evict(self):
+        """Removes least recently used objects until the cache fits in ``max_bytes``."""
+        entries = self._entries()
+        objects: Dict[str, list] = {}
+        for key, entry in entries.items():
+            objects.setdefault(entry["sha256"], []).append(key)
+        # An object shared by several keys counts once and is as recent as its newest key
+        usage = sorted(
+            (max(entries[k]["last_used"] for k in keys), sha, keys)
+            for sha, keys in objects.items()
+        )
+        total = sum(entries[keys[0]]["size"] for _, _, keys in usage)
+        for _, sha, keys in usage:
+            if total <= self.max_bytes:
+                break
+            total -= entries[keys[0]]["size"]
+            for key in keys:
+                del entries[key]
+            try:
+                os.remove(self.object_path(sha))
+            except OSError:
+                pass
+            logger.debug(f"Evicted cached installer {sha}")
+        self._remove_orphans({entry["sha256"] for entry in entries.values()})
+
+    def _remove_orphans(self, referenced):
+        """Deletes objects no entry refers to, e.g. left behind when another process overwrote the index."""
+        objects_dir = os.path.join(self.root, "objects")
+        try:
+            prefixes = os.listdir(objects_dir)
+        except OSError:
+            return
+        for prefix in prefixes:
+            try:
+                names = os.listdir(os.path.join(objects_dir, prefix))
+            except OSError:
+                continue
+            for name in names:
+                # Temporary files belong to a store() in progress
+                if name not in referenced and not name.endswith(".tmp"):
+                    try:
+                        os.remove(os.path.join(objects_dir, prefix, name))
+                        logger.debug(f"Removed unreferenced cached installer {name}")
+                    except OSError:
+                        pass
+
+    def materialize(self, entry: dict, dest_dir: str) -> str:
+        """Places a cached installer in ``dest_dir``, hard-linking where possible."""
+        os.makedirs(dest_dir, exist_ok=True)
+        dest = os.path.join(dest_dir, entry["filename"])
+        src = self.object_path(entry["sha256"])
+        if os.path.exists(dest):
+            os.remove(dest)
+        try:
+            os.link(src, dest)
+        except OSError:
+            shutil.copyfile(src, dest)
+        return dest
@@ -0,0 +1,134 @@
+# installer_mirror.py
+
+"""HTTP server exposing an ``InstallerCache`` to other hosts on the LAN."""
+
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from installer_cache import InstallerCache
+
+logger = logging.getLogger(__name__)
+
+# Seconds a client is told to wait (Retry-After) while the mirror fetches an installer
+RETRY_AFTER = 5
+# Seconds a failed upstream fetch is reported to clients before it is tried again
+FAILURE_TTL = 60
+
+_ERROR_MESSAGES = {403: "URL not allowed", 404: "Not in mirror", 502: "Upstream download failed"}
+
+
+class _MirrorHandler(BaseHTTPRequestHandler):
+    server_version = "BleachBitMirror/1.0"
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == "/fetch":
+            url = parse_qs(parsed.query).get("url", [""])[0]
+            status, entry = self.server.mirror.fetch(url)
+        elif parsed.path.startswith("/sha256/"):
+            entry = self.server.mirror.cache.lookup_sha256(parsed.path[len("/sha256/"):])
+            status = 200 if entry else 404
+        else:
+            self.send_error(404)
+            return
+        if status == 503:
+            # Answer at once rather than holding the connection for the whole upstream download
+            self.send_response(503, "Fetching from upstream")
+            self.send_header("Retry-After", str(RETRY_AFTER))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if entry is None:
+            self.send_error(status, _ERROR_MESSAGES.get(status))
+            return
+
+        path = self.server.mirror.cache.object_path(entry["sha256"])
+        try:
+            with open(path, "rb") as f:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Length", str(entry["size"]))
+                self.send_header("Content-Disposition", f'attachment; filename="{entry["filename"]}"')
+                self.send_header("X-Content-SHA256", entry["sha256"])
+                self.end_headers()
+                self.wfile.flush()
+                self.connection.sendfile(f)
+        except (BrokenPipeError, ConnectionResetError):
+            logger.debug(f"Mirror {self.address_string()}: client disconnected during {entry['filename']}")
+
+    def log_message(self, format, *args):
+        logger.debug(f"Mirror {self.address_string()}: {format % args}")
+
+
+class MirrorServer:
+    """Serves an ``InstallerCache`` over HTTP.
+
+    ``GET /fetch?url=<installer url>`` returns the cached installer. On a miss it starts
+    a single background download through ``fetch_upstream(url)`` and answers 503 with
+    ``Retry-After`` until the installer is cached, or 502 for a while if the download
+    failed. ``GET /sha256/<hex>`` returns an installer by content hash. Only URLs on
+    ``allowed_hosts`` are fetched (403 otherwise), so the mirror cannot be used as an
+    open proxy.
+    """
+
+    def __init__(self, cache: InstallerCache, fetch_upstream: Callable[[str], Optional[str]],
+                 allowed_hosts: Iterable[str], host: str = "0.0.0.0", port: int = 8765):
+        self.cache = cache
+        self.fetch_upstream = fetch_upstream
+        self.allowed_hosts = set(allowed_hosts)
+        self._fetching: Dict[str, threading.Thread] = {}
+        self._failed: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), _MirrorHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.mirror = self
+
+    @property
+    def address(self):
+        return self.httpd.server_address
+
+    def fetch(self, url: str) -> Tuple[int, Optional[dict]]:
+        """Returns ``(200, entry)`` for a cached installer, otherwise an HTTP status and None."""
+        if urlparse(url).hostname not in self.allowed_hosts:
+            logger.warning(f"Mirror refused URL outside allowed hosts: {url}")
+            return 403, None
+        entry = self.cache.lookup_url(url)
+        if entry:
+            return 200, entry
+        with self._lock:
+            # The download may have finished since the lookup above
+            entry = self.cache.lookup_url(url)
+            if entry:
+                return 200, entry
+            if url in self._fetching:
+                return 503, None
+            if time.monotonic() - self._failed.get(url, float("-inf")) < FAILURE_TTL:
+                return 502, None
+            self._failed.pop(url, None)
+            thread = threading.Thread(target=self._fetch_upstream, args=(url,), name="mirror-fetch", daemon=True)
+            self._fetching[url] = thread
+        thread.start()
+        return 503, None
+
+    def _fetch_upstream(self, url: str):
+        try:
+            ok = self.fetch_upstream(url)
+        except Exception:
+            logger.exception(f"Mirror could not fetch {url}")
+            ok = False
+        with self._lock:
+            del self._fetching[url]
+            if not ok or self.cache.lookup_url(url) is None:
+                self._failed[url] = time.monotonic()
+
+    def serve_forever(self):
+        logger.info(f"Serving installer mirror on http://{self.address[0]}:{self.address[1]}/")
+        self.httpd.serve_forever()
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,143 @@
+# installer_verify.py
+
+"""Integrity checks for downloaded installers.
+
+``ThreadedSHA256`` hashes chunks on a helper thread while the download loop keeps
+reading from the network; hashlib releases the GIL while hashing large buffers, so
+the two overlap. ``sha256_mmap`` re-hashes a file on disk through a memory map,
+without copying it through Python buffers. ``find_published_sha256`` and
+``verify_signature`` check an installer against checksums or a detached GnuPG
+signature published next to it.
+"""
+
+import hashlib
+import mmap
+import os
+import queue
+import re
+import shutil
+import subprocess
+import threading
+from typing import Callable, Iterable, Optional
+
+# Chunks queued for the hashing thread before the download loop waits for it
+MAX_PENDING_CHUNKS = 64
+# Checksum files published next to an installer, relative to its URL
+CHECKSUM_SUFFIXES = (".sha256", ".sha256sum")
+CHECKSUM_FILES = ("SHA256SUMS", "sha256sums.txt")
+SIGNATURE_SUFFIXES = (".asc", ".sig")
+
+_GPG_STATUS_PREFIX = "[GNUPG:] "
+_SHA256_RE = re.compile(r"\b[0-9a-fA-F]{64}\b")
+# "<hex>  name", "<hex> *name" (sha256sum) and "SHA256 (name) = <hex>" (BSD)
+_SUM_LINE_RE = re.compile(r"^([0-9a-fA-F]{64})\s+\*?(.+)$")
+_BSD_LINE_RE = re.compile(r"^SHA256\s*\((.+)\)\s*=\s*([0-9a-fA-F]{64})$", re.IGNORECASE)
+
+
+class ThreadedSHA256:
+    """SHA-256 computed on a helper thread; feed it with :meth:`update`, then call :meth:`hexdigest`."""
+
+    def __init__(self, max_pending: int = MAX_PENDING_CHUNKS):
+        self._digest = hashlib.sha256()
+        self._chunks: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=max_pending)
+        self._result: Optional[str] = None
+        self._thread = threading.Thread(target=self._run, name="sha256", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            chunk = self._chunks.get()
+            if chunk is None:
+                return
+            self._digest.update(chunk)
+
+    def update(self, chunk: bytes):
+        self._chunks.put(chunk)
+
+    def close(self):
+        """Stops the thread; safe to call more than once."""
+        if self._thread.is_alive():
+            self._chunks.put(None)
+            self._thread.join()
+
+    def hexdigest(self) -> str:
+        if self._result is None:
+            self.close()
+            self._result = self._digest.hexdigest()
+        return self._result
+
+
+def sha256_mmap(path: str) -> str:
+    """Returns the SHA-256 of ``path``, hashing a read-only memory map of it in one call."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+    return digest.hexdigest()
+
+
+def parse_checksums(text: str, filename: str) -> Optional[str]:
+    """Returns the SHA-256 listed for ``filename`` in a checksum file, or None.
+
+    Understands sha256sum and BSD ``SHA256 (name) = hex`` lines; a file holding a
+    single bare hash is taken to describe ``filename``.
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip() and not line.startswith("#")]
+    for line in lines:
+        match = _SUM_LINE_RE.match(line)
+        if match and os.path.basename(match.group(2).strip()) == filename:
+            return match.group(1).lower()
+        match = _BSD_LINE_RE.match(line)
+        if match and os.path.basename(match.group(1).strip()) == filename:
+            return match.group(2).lower()
+    if len(lines) == 1:
+        match = _SHA256_RE.fullmatch(lines[0])
+        if match:
+            return match.group(0).lower()
+    return None
+
+
+def checksum_urls(url: str) -> Iterable[str]:
+    """URLs where a checksum for the installer at ``url`` may be published, most specific first."""
+    for suffix in CHECKSUM_SUFFIXES:
+        yield url + suffix
+    base = url.rsplit("/", 1)[0]
+    for name in CHECKSUM_FILES:
+        yield f"{base}/{name}"
+
+
+def find_published_sha256(url: str, fetch_text: Callable[[str], Optional[str]]) -> Optional[str]:
+    """Returns the first published SHA-256 for ``url``; ``fetch_text`` returns a URL's body or None."""
+    filename = url.rstrip("/").split("/")[-1]
+    for checksum_url in checksum_urls(url):
+        text = fetch_text(checksum_url)
+        if text:
+            sha256 = parse_checksums(text, filename)
+            if sha256:
+                return sha256
+    return None
+
+
+def verify_signature(filepath: str, signature_path: str) -> Optional[bool]:
+    """Checks a detached GnuPG signature against the keys in the user's keyring.
+
+    Returns True for a good signature and False for a bad one (``BADSIG``, or ``ERRSIG``
+    for a key gpg has). Returns None when the signature cannot be checked: gpg is not
+    installed, the signing key is not in the keyring (``NO_PUBKEY``), or gpg fails for
+    another reason.
+    """
+    gpg = shutil.which("gpg") or shutil.which("gpg2")
+    if not gpg:
+        return None
+    result = subprocess.run([gpg, "--batch", "--status-fd", "1", "--verify", signature_path, filepath],
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    statuses = {line.split()[1] for line in result.stdout.decode("utf-8", "replace").splitlines()
+                if line.startswith(_GPG_STATUS_PREFIX) and len(line.split()) > 1}
+    if "NO_PUBKEY" in statuses:
+        return None
+    if "BADSIG" in statuses or "ERRSIG" in statuses:
+        return False
+    if result.returncode == 0 and "GOODSIG" in statuses:
+        return True
+    return None
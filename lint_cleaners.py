@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+
+"""Lint a directory of CleanerML files for overlapping actions, id collisions and dangerous paths.
+
+Every action path is normalised (case, separators, equivalent variables such as
+``%SystemRoot%``/``%WinDir%`` or ``%UserProfile%\\AppData\\Local``/``%LocalAppData%``)
+and inserted into a trie keyed by path component. The literal part of a path
+becomes trie nodes and any wildcard components are kept as a pattern tail on the
+action. One depth-first pass over the trie then reports:
+
+* ``duplicate-action``: the same normalised action in two places
+* ``shadowed-action``: an action already fully covered by a recursive action above it
+* ``overlapping-action``: an action whose path matches a wildcard action above it
+* ``dangerous-root`` / ``shallow-recursive``: actions that reach into, or directly
+  below, roots such as ``%SystemDrive%`` or ``%WinDir%``
+
+plus ``duplicate-cleaner-id``, ``duplicate-option-id`` and ``parse-error``. The
+actions of each trie node are indexed by their tails, literal components in a dict
+and wildcard components in a short list, so an action is only compared with the
+actions on its own node and its ancestors whose patterns can match it. The cost
+grows with the number of actions rather than with the number of pairs.
+
+Usage: python lint_cleaners.py [cleaners_dir] [--format json] [--strict]
+"""
+
+import argparse
+import json
+import os
+import sys
+import xml.etree.ElementTree as ET
+from fnmatch import fnmatchcase
+
+from cleaner_metadata import iter_cleaner_files, parse_cleaner
+
+SEVERITY_ORDER = {'error': 0, 'warning': 1, 'info': 2}
+
+# Equivalent spellings of the same location, as lowercase component prefixes
+PATH_ALIASES = [
+    (('%userprofile%', 'appdata', 'local'), ('%localappdata%',)),
+    (('%userprofile%', 'appdata', 'roaming'), ('%appdata%',)),
+    (('%temp%',), ('%localappdata%', 'temp')),
+    (('%tmp%',), ('%localappdata%', 'temp')),
+    (('%systemroot%',), ('%windir%',)),
+    (('%commonappdata%',), ('%programdata%',)),
+    (('%allusersprofile%',), ('%programdata%',)),
+    (('%homedrive%',), ('%systemdrive%',)),
+    (('c:',), ('%systemdrive%',)),
+    (('%programw6432%',), ('%programfiles%',)),
+]
+
+# Locations whose contents must never be deleted wholesale
+DANGEROUS_ROOTS = {
+    ('%systemdrive%',), ('%windir%',), ('%windir%', 'system32'), ('%programfiles%',),
+    ('%programfiles(x86)%',), ('%programdata%',), ('%userprofile%',), ('%appdata%',),
+    ('%localappdata%',), ('%public%',), ('%userprofile%', 'documents'), ('%userprofile%', 'desktop'),
+}
+
+# Wildcard components that match every entry
+MATCH_ALL = ('*', '*.*')
+
+
+def normalize_path(path):
+    """Return the lowercase component tuple of an action path, with aliases resolved."""
+    components = []
+    for part in path.replace('/', '\\').lower().split('\\'):
+        if part in ('', '.'):
+            continue
+        if part == '..':
+            if components:
+                components.pop()
+            continue
+        components.append(part)
+    changed = True
+    while changed:
+        changed = False
+        for prefix, replacement in PATH_ALIASES:
+            if tuple(components[:len(prefix)]) == prefix:
+                components = list(replacement) + components[len(prefix):]
+                changed = True
+    return tuple(components)
+
+
+def _has_wildcard(component):
+    return any(char in component for char in '*?[')
+
+
+class Action:
+    """One action of one option, with its trie anchor and wildcard tail."""
+
+    __slots__ = ('file', 'cleaner', 'option', 'path', 'recurse', 'anchor', 'tail')
+
+    def __init__(self, file, cleaner, option, path, recurse):
+        self.file = file
+        self.cleaner = cleaner
+        self.option = option
+        self.path = path
+        self.recurse = recurse
+        components = normalize_path(path)
+        split = next((i for i, part in enumerate(components) if _has_wildcard(part)), len(components))
+        self.anchor = components[:split]
+        self.tail = components[split:]
+
+    @property
+    def key(self):
+        return (self.tail, self.recurse)
+
+    def as_dict(self):
+        return {'file': self.file, 'cleaner': self.cleaner, 'option': self.option, 'path': self.path,
+                'recurse': self.recurse}
+
+
+class _Node:
+    __slots__ = ('children', 'actions')
+
+    def __init__(self):
+        self.children = {}
+        self.actions = []
+
+
+class PathTrie:
+    """Trie of action anchors keyed by normalised path component."""
+
+    def __init__(self):
+        self.root = _Node()
+        self.size = 0
+
+    def insert(self, action):
+        node = self.root
+        for component in action.anchor:
+            child = node.children.get(component)
+            if child is None:
+                child = node.children[component] = _Node()
+            node = child
+        node.actions.append(action)
+        self.size += 1
+
+
+def coverage(outer, relative, inner):
+    """How ``outer`` covers ``inner``, whose anchor-plus-tail is ``relative`` below ``outer``'s anchor.
+
+    Returns 'shadowed' when everything ``inner`` deletes is already deleted by ``outer``,
+    'overlapping' when they match some of the same paths, or None.
+    """
+    tail = outer.tail
+    if not tail:
+        # A literal path only reaches below itself when it is deleted recursively
+        if outer.recurse and (relative or not inner.recurse):
+            return 'shadowed'
+        return None
+    if len(relative) < len(tail):
+        # A recursive inner action reaches the deeper paths the pattern matches
+        if inner.recurse and all(fnmatchcase(part, pattern) for part, pattern in zip(relative, tail)):
+            return 'overlapping'
+        return None
+    if not all(fnmatchcase(part, pattern) for part, pattern in zip(relative, tail)):
+        return None
+    if len(relative) > len(tail) and not outer.recurse:
+        return None
+    # A single file, the same pattern, or everything below a matched entry is deleted already
+    if not inner.tail and not inner.recurse:
+        return 'shadowed'
+    if relative == tail or all(pattern in MATCH_ALL for pattern in tail):
+        if outer.recurse or not inner.recurse:
+            return 'shadowed'
+    return 'overlapping'
+
+
+class _TailNode:
+    __slots__ = ('literal', 'wild', 'actions', 'deeper')
+
+    def __init__(self):
+        self.literal = {}
+        self.wild = {}
+        self.actions = []
+        # Any one action that ends below this node
+        self.deeper = None
+
+
+class _NodeIndex:
+    """The actions of one trie node that can cover others: the first recursive literal
+    action, and the wildcard actions in a trie of their tail components."""
+
+    __slots__ = ('recursive', 'tails')
+
+    def __init__(self):
+        self.recursive = None
+        self.tails = None
+
+    def __bool__(self):
+        return self.recursive is not None or self.tails is not None
+
+    def add(self, action):
+        if not action.tail:
+            if action.recurse and self.recursive is None:
+                self.recursive = action
+            return
+        node = self.tails = self.tails or _TailNode()
+        for component in action.tail:
+            node.deeper = node.deeper or action
+            children = node.wild if _has_wildcard(component) else node.literal
+            node = children.get(component) or children.setdefault(component, _TailNode())
+        node.actions.append(action)
+
+    def candidates(self, relative, inner):
+        """Yield the actions whose tail can match ``relative``; :func:`coverage` decides how."""
+        if self.recursive is not None:
+            yield self.recursive
+        if self.tails is None:
+            return
+        frontier = [self.tails]
+        for component in relative:
+            following = []
+            for node in frontier:
+                # A recursive action whose tail ends here covers everything below its matches
+                yield from (action for action in node.actions if action.recurse)
+                child = node.literal.get(component)
+                if child is not None:
+                    following.append(child)
+                following.extend(child for pattern, child in node.wild.items() if fnmatchcase(component, pattern))
+            frontier = following
+            if not frontier:
+                return
+        for node in frontier:
+            yield from node.actions
+            if inner.recurse and node.deeper is not None:
+                yield node.deeper
+
+
+def _finding(severity, code, message, action=None, related=None, **extra):
+    finding = {'severity': severity, 'code': code, 'message': message}
+    if action is not None:
+        finding.update(action.as_dict())
+    if related is not None:
+        finding['related'] = related.as_dict()
+    finding.update(extra)
+    return finding
+
+
+def check_trie(trie):
+    """Yield findings for duplicate, shadowed, overlapping and dangerous actions in one pass."""
+    # Each stack entry: node, its path, and the indexes of the nodes above it that have any (with their depth)
+    stack = [(trie.root, (), [])]
+    while stack:
+        node, path, ancestors = stack.pop()
+
+        seen = {}
+        index = _NodeIndex()
+        for action in node.actions:
+            first = seen.get(action.key)
+            if first is not None:
+                yield _finding('warning', 'duplicate-action',
+                               f'{action.path} duplicates {first.cleaner}/{first.option}', action, first)
+                continue
+            seen[action.key] = action
+            index.add(action)
+        # Same node first (e.g. "dir" recursive vs "dir\*.log"), then nearest ancestor upwards
+        indexes = [(len(path), index)] + ancestors[::-1]
+
+        for action in seen.values():
+            yield from _check_root(action)
+
+            relative = path + action.tail
+            found = None
+            for depth, candidates in indexes:
+                for other in candidates.candidates(relative[depth:], action):
+                    if other is action:
+                        continue
+                    kind = coverage(other, relative[depth:], action)
+                    if kind == 'shadowed':
+                        found = (kind, other)
+                        break
+                    if kind and found is None:
+                        found = (kind, other)
+                if found and found[0] == 'shadowed':
+                    break
+            if found:
+                kind, other = found
+                if kind == 'shadowed':
+                    yield _finding('warning', 'shadowed-action',
+                                   f'{action.path} is already covered by {other.path} '
+                                   f'({other.cleaner}/{other.option})', action, other)
+                else:
+                    yield _finding('info', 'overlapping-action',
+                                   f'{action.path} overlaps wildcard action {other.path} '
+                                   f'({other.cleaner}/{other.option})', action, other)
+
+        if node.children:
+            below = ancestors + [(len(path), index)] if index else ancestors
+            for component, child in node.children.items():
+                stack.append((child, path + (component,), below))
+
+
+def _check_root(action):
+    anchor = action.anchor
+    for length in range(len(anchor), 0, -1):
+        if anchor[:length] in DANGEROUS_ROOTS:
+            depth = len(anchor) - length
+            if depth == 0:
+                # A narrow pattern such as %LocalAppData%\*.tmp is risky; the root itself or all of it is worse
+                wholesale = not action.tail or action.recurse or all(p in MATCH_ALL for p in action.tail)
+                yield _finding('error' if wholesale else 'warning', 'dangerous-root',
+                               f'{action.path} deletes in or at the root {anchor[-1]}', action)
+            elif depth == 1 and action.recurse and not action.tail:
+                yield _finding('warning', 'shallow-recursive',
+                               f'{action.path} deletes recursively one level below {anchor[length - 1]}', action)
+            return
+
+
+def lint_directory(cleaners_dir):
+    """Lint every cleaner in ``cleaners_dir``; returns ``(findings, stats)``."""
+    findings = []
+    trie = PathTrie()
+    cleaner_ids = {}
+    files = 0
+    for path in iter_cleaner_files(cleaners_dir):
+        files += 1
+        name = os.path.basename(path)
+        try:
+            cleaner = parse_cleaner(path)
+        except (ET.ParseError, OSError) as e:
+            findings.append(_finding('error', 'parse-error', str(e), file=name))
+            continue
+
+        cleaner_id = cleaner['id']
+        if cleaner_id in cleaner_ids:
+            findings.append(_finding('error', 'duplicate-cleaner-id',
+                                     f'cleaner id "{cleaner_id}" is also used by {cleaner_ids[cleaner_id]}',
+                                     file=name, cleaner=cleaner_id))
+        else:
+            cleaner_ids[cleaner_id] = name
+
+        option_ids = set()
+        for option in cleaner['options']:
+            if option['id'] in option_ids:
+                findings.append(_finding('error', 'duplicate-option-id',
+                                         f'option id "{option["id"]}" appears twice in {cleaner_id}',
+                                         file=name, cleaner=cleaner_id, option=option['id']))
+            option_ids.add(option['id'])
+            for attributes in option['actions']:
+                if attributes.get('command', 'delete') not in ('delete', 'wipe') or not attributes.get('path'):
+                    continue
+                recurse = attributes.get('recurse', '').lower() == 'true' or \
+                    attributes.get('search', '').startswith('walk')
+                trie.insert(Action(name, cleaner_id, option['id'], attributes['path'], recurse))
+
+    findings.extend(check_trie(trie))
+    findings.sort(key=lambda f: (SEVERITY_ORDER[f['severity']], f.get('file', ''), f['code']))
+    return findings, {'files': files, 'actions': trie.size}
+
+
+def main():
+    default_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cleaners')
+    parser = argparse.ArgumentParser(description='Lint CleanerML files for overlaps, id collisions and dangerous paths.')
+    parser.add_argument('cleaners_dir', nargs='?', default=default_dir,
+                        help='Directory of cleaner XML files (default: the project cleaners directory)')
+    parser.add_argument('--format', choices=['text', 'json'], default='text', help='Output format')
+    parser.add_argument('--strict', action='store_true', help='Exit with status 1 on warnings as well as errors')
+    args = parser.parse_args()
+
+    findings, stats = lint_directory(args.cleaners_dir)
+    if args.format == 'json':
+        print(json.dumps({'stats': stats, 'findings': findings}, indent=2))
+    else:
+        for finding in findings:
+            location = '/'.join(filter(None, [finding.get('file'), finding.get('option')]))
+            print(f"{location}: {finding['severity']}: {finding['code']}: {finding['message']}")
+        print(f"{stats['files']} file(s), {stats['actions']} action(s), {len(findings)} finding(s)")
+
+    failing = {'error', 'warning'} if args.strict else {'error'}
+    return 1 if any(f['severity'] in failing for f in findings) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+
+"""Record how much each cleaner option would free over time, in a local SQLite database.
+
+Each scan is a run. For every option the store keeps the option's total and the
+file count and bytes of each top directory it deletes from, e.g.
+``...\\NVIDIA\\DXCache``. Whatever a wildcard action matches counts towards the
+literal part of its path, so ``%Temp%\\*`` is one row however many entries it
+matches. Targets are sized on a worker pool with the same walk as the cleaner
+browser, so no file lists are held in memory, and finished targets are written in
+batches. The database uses WAL mode, so reports can be read while a scan writes.
+
+Growth rates are least-squares slopes (bytes per day) computed by SQLite from
+per-option or per-directory sums, so they stay a single indexed query over months
+of runs.
+
+Usage:
+    python scan_history.py scan [cleaners_dir] [--note TEXT] [--no-whitelist]
+    python scan_history.py growth [--days 30] [--by option|directory] [-n 20]
+    python scan_history.py top [--by option|directory] [-n 20]
+"""
+
+import argparse
+import os
+import socket
+import sqlite3
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from cleaner_metadata import iter_cleaner_files, parse_cleaner
+from cleaner_sizing import format_size, option_targets, size_target
+from installer_cache import default_cache_dir
+
+# Directory rows written per executemany()
+BATCH_SIZE = 500
+SECONDS_PER_DAY = 86400.0
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    finished REAL,
+    host TEXT,
+    note TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_by_start ON runs (started);
+CREATE TABLE IF NOT EXISTS option_totals (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    cleaner TEXT NOT NULL,
+    option TEXT NOT NULL,
+    files INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    PRIMARY KEY (run_id, cleaner, option)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS option_totals_by_option ON option_totals (cleaner, option, run_id);
+CREATE TABLE IF NOT EXISTS directory_totals (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    cleaner TEXT NOT NULL,
+    option TEXT NOT NULL,
+    directory TEXT NOT NULL,
+    files INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    PRIMARY KEY (run_id, cleaner, option, directory)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS directory_totals_by_directory ON directory_totals (directory, run_id);
+'''
+
+# Grouping columns for queries by option or by target directory
+LEVELS = {
+    'option': ('option_totals', ('cleaner', 'option')),
+    'directory': ('directory_totals', ('directory',)),
+}
+
+
+def default_database_path():
+    return os.path.join(default_cache_dir(), 'scan_history.sqlite3')
+
+
+class ScanRun:
+    """One scan being recorded; rows are buffered and written BATCH_SIZE at a time."""
+
+    def __init__(self, history, run_id):
+        self.history = history
+        self.id = run_id
+        self._pending = []
+        self._options = {}
+
+    def add(self, cleaner, option, directory, files, nbytes):
+        """Add files and bytes of an option to one of its directories."""
+        self._pending.append((self.id, cleaner, option, directory, files, nbytes))
+        total = self._options.setdefault((cleaner, option), [0, 0])
+        total[0] += files
+        total[1] += nbytes
+        if len(self._pending) >= BATCH_SIZE:
+            self._flush()
+
+    def add_option(self, cleaner, option):
+        """Make sure an option with nothing to delete is recorded with a zero total."""
+        self._options.setdefault((cleaner, option), [0, 0])
+
+    def _flush(self):
+        with self.history.connection:
+            self.history.connection.executemany(
+                'INSERT INTO directory_totals VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (run_id, cleaner, option, directory) '
+                'DO UPDATE SET files = files + excluded.files, bytes = bytes + excluded.bytes', self._pending)
+        self._pending = []
+
+    def close(self):
+        """Write the remaining rows and the option totals, and mark the run finished."""
+        self._flush()
+        with self.history.connection as connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO option_totals VALUES (?, ?, ?, ?, ?)',
+                [(self.id, cleaner, option, files, nbytes)
+                 for (cleaner, option), (files, nbytes) in self._options.items()])
+            connection.execute('UPDATE runs SET finished = ? WHERE id = ?', (time.time(), self.id))
+        return self.id
+
+
+class ScanHistory:
+    """SQLite store of scan runs and the queries over them."""
+
+    def __init__(self, path=None):
+        self.path = path or default_database_path()
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        # WAL keeps the database consistent on power loss; NORMAL only risks the last transaction
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def start_run(self, note=None, started=None):
+        with self.connection:
+            cursor = self.connection.execute(
+                'INSERT INTO runs (started, host, note) VALUES (?, ?, ?)',
+                (started if started is not None else time.time(), socket.gethostname(), note))
+        return ScanRun(self, cursor.lastrowid)
+
+    def runs(self, limit=20):
+        """Most recent runs first, as ``(id, started, finished, host, note)`` tuples."""
+        return self.connection.execute(
+            'SELECT id, started, finished, host, note FROM runs ORDER BY started DESC LIMIT ?', (limit,)).fetchall()
+
+    def latest_run_id(self):
+        row = self.connection.execute(
+            'SELECT id FROM runs WHERE finished IS NOT NULL ORDER BY started DESC LIMIT 1').fetchone()
+        return row[0] if row else None
+
+    def top_offenders(self, by='option', limit=20, run_id=None):
+        """The largest options or directories of a run (the latest by default).
+
+        Returns ``(key, files, bytes)`` tuples, where ``key`` is ``(cleaner, option)`` or ``(directory,)``.
+        """
+        table, columns = LEVELS[by]
+        run_id = run_id if run_id is not None else self.latest_run_id()
+        if run_id is None:
+            return []
+        rows = self.connection.execute(
+            f'SELECT {", ".join(columns)}, SUM(files), SUM(bytes) FROM {table} WHERE run_id = ? '
+            f'GROUP BY {", ".join(columns)} ORDER BY SUM(bytes) DESC LIMIT ?', (run_id, limit))
+        return [(tuple(row[:-2]), row[-2], row[-1]) for row in rows]
+
+    def growth_rates(self, by='option', days=30, limit=20, now=None):
+        """Options or directories growing fastest over the last ``days``, in bytes per day.
+
+        Returns ``(key, runs, bytes_per_day, latest_bytes)`` tuples for keys seen in at least
+        two runs, fastest first.
+        """
+        table, columns = LEVELS[by]
+        since = (now if now is not None else time.time()) - days * SECONDS_PER_DAY
+        # x is days since the window start, y is bytes; slope = (nΣxy - ΣxΣy) / (nΣx² - (Σx)²)
+        rows = self.connection.execute(f'''
+            SELECT {", ".join(columns)}, COUNT(*) AS n, SUM(x), SUM(y), SUM(x * x), SUM(x * y), MAX(x)
+            FROM (
+                SELECT {", ".join("t." + column for column in columns)},
+                       (r.started - :since) / {SECONDS_PER_DAY} AS x, SUM(t.bytes) AS y
+                FROM {table} t JOIN runs r ON r.id = t.run_id
+                WHERE r.started >= :since AND r.finished IS NOT NULL
+                GROUP BY t.run_id, {", ".join("t." + column for column in columns)}
+            )
+            GROUP BY {", ".join(columns)}
+            HAVING n >= 2''', {'since': since}).fetchall()
+
+        rates = []
+        width = len(columns)
+        for row in rows:
+            n, sum_x, sum_y, sum_xx, sum_xy, _ = row[width:]
+            denominator = n * sum_xx - sum_x * sum_x
+            if denominator <= 0:
+                continue
+            rates.append((tuple(row[:width]), n, (n * sum_xy - sum_x * sum_y) / denominator))
+        rates.sort(key=lambda rate: rate[2], reverse=True)
+        rates = rates[:limit]
+
+        # Attach the most recent size of each key
+        latest = {key: nbytes for key, _, nbytes in self.top_offenders(by, limit=sys.maxsize)}
+        return [(key, n, slope, latest.get(key, 0)) for key, n, slope in rates]
+
+    def expire(self, days):
+        """Delete runs older than ``days``; returns how many were removed."""
+        with self.connection:
+            cursor = self.connection.execute(
+                'DELETE FROM runs WHERE started < ?', (time.time() - days * SECONDS_PER_DAY,))
+        return cursor.rowcount
+
+
+def scan_cleaners(history, cleaners_dir, prune=None, max_workers=4, note=None):
+    """Size every option of every cleaner in ``cleaners_dir`` and record it as one run.
+
+    Targets are walked on a worker pool; results are written as each target finishes.
+    Returns the run id.
+    """
+    run = history.start_run(note)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scan-history') as pool:
+        futures = {}
+        for path in iter_cleaner_files(cleaners_dir):
+            try:
+                cleaner = parse_cleaner(path)
+            except (ET.ParseError, OSError):
+                continue
+            for option in cleaner['options']:
+                run.add_option(cleaner['id'], option['id'])
+                for target, (recurse, directory) in option_targets(option['actions']).items():
+                    future = pool.submit(size_target, target, recurse, prune=prune)
+                    futures[future] = (cleaner['id'], option['id'], directory)
+
+        for future in as_completed(futures):
+            cleaner_id, option_id, directory = futures.pop(future)
+            try:
+                files, nbytes = future.result()
+            except OSError:
+                continue
+            run.add(cleaner_id, option_id, directory, files, nbytes)
+    return run.close()
+
+
+def _load_whitelist():
+    from bleachbit_settings_manager import BleachBitSettingsManager
+    from bleachbit_whitelist import Whitelist
+    return Whitelist.from_config_dir(BleachBitSettingsManager().config_dir)
+
+
+def _format_key(key):
+    return '/'.join(key)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record and report how much cleaner options would free over time.')
+    parser.add_argument('--db', help='Database path (default: %(default)s)', default=default_database_path())
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    scan = commands.add_parser('scan', help='Size every cleaner option and record the run')
+    scan.add_argument('cleaners_dir', nargs='?',
+                      default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cleaners'),
+                      help='Directory of cleaner XML files (default: the project cleaners directory)')
+    scan.add_argument('--note', help='Free-form note stored with the run')
+    scan.add_argument('--no-whitelist', action='store_true', help='Count whitelisted files as well')
+    scan.add_argument('-j', '--jobs', type=int, default=4, help='Worker threads (default: %(default)s)')
+    scan.add_argument('--expire-days', type=float, help='Afterwards, delete runs older than this many days')
+
+    growth = commands.add_parser('growth', help='Show the fastest growing options or directories')
+    growth.add_argument('--days', type=float, default=30, help='Window to fit over (default: %(default)s)')
+
+    top = commands.add_parser('top', help='Show the largest options or directories of the latest run')
+    for command in (growth, top):
+        command.add_argument('--by', choices=sorted(LEVELS), default='option')
+        command.add_argument('-n', '--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    history = ScanHistory(args.db)
+    try:
+        if args.command == 'scan':
+            prune = None
+            if not args.no_whitelist:
+                try:
+                    prune = _load_whitelist().is_protected
+                except (OSError, ValueError) as e:
+                    print(f'Warning: could not read the BleachBit whitelist, counting everything: {e}')
+            started = time.monotonic()
+            run_id = scan_cleaners(history, args.cleaners_dir, prune, max_workers=args.jobs, note=args.note)
+            total = sum(nbytes for _, _, nbytes in history.top_offenders('option', sys.maxsize, run_id))
+            print(f'Recorded run {run_id}: {format_size(total)} reclaimable, '
+                  f'scanned in {time.monotonic() - started:.1f} s')
+            if args.expire_days is not None:
+                print(f'Expired {history.expire(args.expire_days)} old run(s)')
+        elif args.command == 'growth':
+            rates = history.growth_rates(args.by, args.days, args.limit)
+            if not rates:
+                print(f'Not enough runs in the last {args.days:g} days to compute growth.')
+            for key, runs, per_day, latest in rates:
+                sign = '-' if per_day < 0 else '+'
+                print(f'{sign}{format_size(abs(int(per_day))):>10}/day  {format_size(latest):>10} now  '
+                      f'{runs:3} runs  {_format_key(key)}')
+        else:
+            for key, files, nbytes in history.top_offenders(args.by, args.limit):
+                print(f'{format_size(nbytes):>10}  {files:8} files  {_format_key(key)}')
+    finally:
+        history.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
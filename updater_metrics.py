@@ -0,0 +1,212 @@
+# updater_metrics.py
+
+"""Timing spans and counters for the BleachBit updater.
+
+Metrics are collected in memory and can be exported as a JSON report or as a
+Prometheus textfile-collector file. A disabled collector hands out a shared
+no-op span, so instrumented code costs little more than a ``with`` statement.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List
+
+PROMETHEUS_PREFIX = "bleachbit_updater"
+
+
+class _NullSpan:
+    """Span returned when metrics are disabled; every operation is a no-op."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **fields):
+        pass
+
+    def add_bytes(self, count: int):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """A timed phase such as a fetch, parse, download or installer run."""
+
+    __slots__ = ("name", "labels", "fields", "bytes", "start", "duration", "error", "_metrics")
+
+    def __init__(self, metrics: "UpdaterMetrics", name: str, labels: Dict[str, str]):
+        self._metrics = metrics
+        self.name = name
+        self.labels = labels
+        self.fields = {}
+        self.bytes = 0
+        self.start = 0.0
+        self.duration = 0.0
+        self.error = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        self._metrics._record(self)
+        return False
+
+    def set(self, **fields):
+        """Attach extra measurements (e.g. ttfb, status, retries) to the span."""
+        self.fields.update(fields)
+
+    def add_bytes(self, count: int):
+        self.bytes += count
+
+    def as_dict(self) -> dict:
+        data = {
+            "name": self.name,
+            "labels": self.labels,
+            "start": round(self.start - self._metrics.started, 6),
+            "duration": round(self.duration, 6),
+            "bytes": self.bytes,
+        }
+        if self.bytes and self.duration > 0:
+            data["throughput_bps"] = round(self.bytes / self.duration, 1)
+        if self.fields:
+            data["fields"] = self.fields
+        if self.error:
+            data["error"] = self.error
+        return data
+
+
+class UpdaterMetrics:
+    """Collects spans and counters for one updater run."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.started_at = datetime.now().isoformat()
+        self._lock = threading.Lock()
+        self._spans: List[Span] = []
+        self._counters: Dict[tuple, float] = {}
+
+    def span(self, name: str, **labels):
+        """Returns a context manager timing the enclosed block."""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, {k: str(v) for k, v in labels.items()})
+
+    def incr(self, name: str, value: float = 1, **labels):
+        """Increments a counter such as ``http_retries`` or ``cache_hits``."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def _record(self, span: Span):
+        with self._lock:
+            self._spans.append(span)
+
+    def report(self) -> dict:
+        """Returns all collected spans and counters as a JSON-serialisable dict."""
+        with self._lock:
+            spans = [s.as_dict() for s in self._spans]
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+        return {
+            "started_at": self.started_at,
+            "elapsed": round(time.perf_counter() - self.started, 6),
+            "spans": spans,
+            "counters": counters,
+        }
+
+    def write_json(self, path: str):
+        """Writes the report to ``path`` as JSON."""
+        _atomic_write(path, json.dumps(self.report(), indent=4))
+
+    def write_prometheus(self, path: str):
+        """Writes the metrics in Prometheus text exposition format.
+
+        The file is written atomically so node_exporter's textfile collector
+        never reads a partial file.
+        """
+        _atomic_write(path, self.to_prometheus())
+
+    def to_prometheus(self) -> str:
+        with self._lock:
+            spans = list(self._spans)
+            counters = sorted(self._counters.items())
+
+        # Aggregate spans by phase and labels: count, total seconds and bytes.
+        phases: Dict[tuple, List[float]] = {}
+        for span in spans:
+            key = (span.name, tuple(sorted(span.labels.items())))
+            entry = phases.setdefault(key, [0, 0.0, 0])
+            entry[0] += 1
+            entry[1] += span.duration
+            entry[2] += span.bytes
+
+        lines = []
+        metric = f"{PROMETHEUS_PREFIX}_phase_duration_seconds"
+        lines.append(f"# HELP {metric} Time spent in each updater phase.")
+        lines.append(f"# TYPE {metric} summary")
+        for (name, labels), (count, seconds, _) in sorted(phases.items()):
+            label_str = _format_labels((("phase", name),) + labels)
+            lines.append(f"{metric}_sum{label_str} {seconds:.6f}")
+            lines.append(f"{metric}_count{label_str} {count}")
+
+        metric = f"{PROMETHEUS_PREFIX}_phase_bytes_total"
+        lines.append(f"# HELP {metric} Bytes transferred in each updater phase.")
+        lines.append(f"# TYPE {metric} counter")
+        for (name, labels), (_, _, nbytes) in sorted(phases.items()):
+            lines.append(f"{metric}{_format_labels((('phase', name),) + labels)} {nbytes}")
+
+        seen = set()
+        for (name, labels), value in counters:
+            metric = f"{PROMETHEUS_PREFIX}_{name}_total"
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_format_labels(labels)} {value:g}")
+
+        metric = f"{PROMETHEUS_PREFIX}_last_run_timestamp_seconds"
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {time.time():.3f}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _atomic_write(path: str, data: str):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
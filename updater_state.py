@@ -0,0 +1,50 @@
+# updater_state.py
+
+"""Persistent updater state: cached installed-version probes and release lookups."""
+
+import json
+import os
+import tempfile
+from typing import Any, Optional
+
+from installer_cache import default_cache_dir
+
+
+class UpdaterState:
+    """A small JSON document of named sections, written atomically on every change."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(default_cache_dir(), "updater_state.json")
+        self._data: Optional[dict] = None
+
+    def _load(self) -> dict:
+        if self._data is None:
+            try:
+                with open(self.path, "r") as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError):
+                self._data = {}
+        return self._data
+
+    def get(self, section: str, default: Any = None) -> Any:
+        return self._load().get(section, default)
+
+    def set(self, section: str, value: Any):
+        self._load()[section] = value
+        self._save()
+
+    def remove(self, section: str):
+        if self._load().pop(section, None) is not None:
+            self._save()
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".state-")
+            with os.fdopen(fd, "w") as f:
+                json.dump(self._data, f, indent=4)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # The state only saves work on the next run; failing to write it is not fatal
+            pass
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+
+"""Convert winapp2.ini entries into CleanerML files, one XML file per entry.
+
+The INI file is streamed one section at a time, so memory use does not grow with
+the size of the file. Sections are converted in worker processes. A state file in
+the output directory records a hash of every section, so later runs only rewrite
+entries that changed and remove the files of entries that disappeared. Files are
+named ``winapp2_<entry>.xml``, and a file the state does not record is never
+overwritten or removed, so hand-written cleaners in the same directory are safe.
+
+Usage: python winapp2_converter.py winapp2.ini [-o cleaners] [-j WORKERS] [--force]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from xml.sax.saxutils import escape, quoteattr
+
+# Bump when the generated XML changes so every entry is regenerated on the next run
+CONVERTER_VERSION = '6'
+STATE_FILE = '.winapp2_state.json'
+# Header comment identifying generated files
+GENERATED_MARK = 'Generated by winapp2_converter.py'
+# Sections sent to a worker process per task
+BATCH_SIZE = 64
+# Batches queued per worker before the reader waits for results
+QUEUE_DEPTH = 4
+
+# winapp2.ini variables that Windows (and so BleachBit) does not define
+ENV_VAR_MAP = {
+    'commonappdata': ['%ProgramData%'],
+    'locallowappdata': ['%UserProfile%\\AppData\\LocalLow'],
+    'documents': ['%UserProfile%\\Documents'],
+    'desktop': ['%UserProfile%\\Desktop'],
+    'pictures': ['%UserProfile%\\Pictures'],
+    'music': ['%UserProfile%\\Music'],
+    'video': ['%UserProfile%\\Videos'],
+    # winapp2 uses %ProgramFiles% for both the 64-bit and the 32-bit directory
+    'programfiles': ['%ProgramFiles%', '%ProgramFiles(x86)%'],
+    'commonprogramfiles': ['%CommonProgramFiles%', '%CommonProgramFiles(x86)%'],
+}
+
+_ENV_VAR = re.compile(r'%([^%]+)%')
+_NUMBERED_KEY = re.compile(r'^([A-Za-z]+?)(\d*)$')
+
+
+def iter_sections(lines):
+    """Yield ``(name, [(key, value), ...])`` for each section of an INI stream.
+
+    Only the current section is held in memory. Comments (``;``) and blank lines
+    are skipped, as are keys that appear before the first section header.
+    """
+    name = None
+    entries = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith(';'):
+            continue
+        if line.startswith('[') and line.endswith(']'):
+            if name is not None:
+                yield name, entries
+            name = line[1:-1].strip()
+            entries = []
+        elif name is not None and '=' in line:
+            key, value = line.split('=', 1)
+            entries.append((key.strip(), value.strip()))
+    if name is not None:
+        yield name, entries
+
+
+def section_hash(name, entries):
+    digest = hashlib.sha256(f'{CONVERTER_VERSION}\0{name}'.encode('utf-8'))
+    for key, value in entries:
+        digest.update(f'\0{key}={value}'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def slugify(name):
+    """Turn an entry name such as ``Adobe Reader *`` into ``adobe_reader``."""
+    return re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_') or 'entry'
+
+
+def expand_variables(path):
+    """Translate winapp2 variables, returning every path the entry refers to."""
+    paths = ['']
+    position = 0
+    for match in _ENV_VAR.finditer(path):
+        literal = path[position:match.start()]
+        replacements = ENV_VAR_MAP.get(match.group(1).lower(), [match.group(0)])
+        paths = [prefix + literal + replacement for prefix in paths for replacement in replacements]
+        position = match.end()
+    return [prefix + path[position:] for prefix in paths]
+
+
+def _split_key(key):
+    match = _NUMBERED_KEY.match(key)
+    return match.group(1).lower() if match else key.lower()
+
+
+def file_key_actions(value):
+    """Translate a ``FileKeyN`` value (``path|patterns|flags``) into action attribute dicts."""
+    parts = value.split('|')
+    directory = parts[0].rstrip('\\')
+    patterns = [p for p in (parts[1] if len(parts) > 1 else '*').split(';') if p] or ['*']
+    flags = parts[2].upper() if len(parts) > 2 else ''
+
+    actions = []
+    for base in expand_variables(directory):
+        for pattern in patterns:
+            action = {'command': 'delete', 'path': f'{base}\\{pattern}'}
+            if flags in ('RECURSE', 'REMOVESELF'):
+                action['recurse'] = 'true'
+            actions.append(action)
+        if flags == 'REMOVESELF':
+            # Without recurse, BleachBit only removes the directory once it is empty
+            actions.append({'command': 'delete', 'path': base})
+    return actions
+
+
+def reg_key_actions(value):
+    """Translate a ``RegKeyN`` value (``key`` or ``key|value name``) into action attribute dicts."""
+    key, _, name = value.partition('|')
+    if name:
+        return [{'command': 'regval', 'path': key, 'name': name}]
+    return [{'command': 'regkey', 'path': key}]
+
+
+def _comment(text):
+    """Escape ``text`` for an XML comment, which may not contain ``--`` or end with ``-``."""
+    return re.sub(r'-(?=-|$)', '- ', escape(text))
+
+
+def _format_action(attributes):
+    return '<action ' + ' '.join(f'{key}={quoteattr(value)}' for key, value in attributes.items()) + '/>'
+
+
+def has_excludes(entries):
+    """Return True if an entry protects some of its files with ``ExcludeKeyN``."""
+    return any(_split_key(key) == 'excludekey' for key, _ in entries)
+
+
+def convert_section(name, entries, cleaner_id=None):
+    """Return the CleanerML document for one winapp2.ini entry.
+
+    ``cleaner_id`` defaults to ``winapp2_`` plus the slug of the entry name.
+    """
+    label = name.rstrip(' *').strip() or name
+    cleaner_id = cleaner_id or f'winapp2_{slugify(label)}'
+    section = ''
+    detects = []
+    actions = []
+    for key, value in entries:
+        kind = _split_key(key)
+        if kind == 'filekey':
+            actions.extend(file_key_actions(value))
+        elif kind == 'regkey':
+            actions.extend(reg_key_actions(value))
+        elif kind in ('detect', 'detectfile', 'detectos', 'specialdetect'):
+            detects.append(f'{key}={" | ".join(expand_variables(value))}')
+        elif kind == 'section':
+            section = value
+
+    description = f'{section}: {label}' if section else label
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        f'<!-- {GENERATED_MARK} from winapp2.ini entry {_comment(f"[{name}]")} -->',
+    ]
+    # CleanerML has no equivalent of winapp2's detection keys; keep them for review
+    for detect in detects:
+        lines.append(f'<!-- winapp2 {_comment(detect)} -->')
+    lines += [
+        f'<cleaner id={quoteattr(cleaner_id)}>',
+        f'    <label>{escape(label)}</label>',
+        f'    <description>{escape(description)}</description>',
+        '    <version>winapp2</version>',
+        '',
+        '    <option id="clean">',
+        f'        <label>{escape(label)}</label>',
+        f'        <description>Files and registry entries listed by winapp2.ini for {escape(label)}.</description>',
+    ]
+    lines += [f'        {_format_action(action)}' for action in actions]
+    lines += [
+        '    </option>',
+        '</cleaner>',
+        '',
+    ]
+    return '\n'.join(lines)
+
+
+def _write_sections(output_dir, batch):
+    """Worker entry point: convert ``(filename, name, entries)`` jobs, writing each file atomically."""
+    for filename, name, entries in batch:
+        path = os.path.join(output_dir, filename)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            # The id follows the file name, which is disambiguated when two entries share a slug
+            f.write(convert_section(name, entries, os.path.splitext(filename)[0]))
+        os.replace(tmp_path, path)
+    return len(batch)
+
+
+def is_generated(path):
+    """Return True if ``path`` is a file written by this converter."""
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            return GENERATED_MARK in f.read(512)
+    except OSError:
+        return False
+
+
+def load_state(output_dir):
+    try:
+        with open(os.path.join(output_dir, STATE_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(output_dir, state):
+    path = os.path.join(output_dir, STATE_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def convert_file(ini_path, output_dir, workers=None, force=False):
+    """Convert ``ini_path`` into ``output_dir``; returns a dict of counts.
+
+    Unchanged sections (same content hash and file name as the last run) are skipped
+    unless ``force`` is set. Files of sections no longer in the INI are removed.
+    Sections whose file name is taken by a file the last run did not write are
+    skipped and counted as ``conflicts``. Sections with ``ExcludeKeyN`` keys are
+    skipped and counted as ``excluded``: CleanerML cannot express the exclusion, so
+    their deletes would remove files winapp2 protects.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    previous = load_state(output_dir)
+    # Only files a previous run wrote may be overwritten or removed, even with force
+    owned = {entry['file'] for entry in previous.values()}
+    if force:
+        previous = {}
+    state = {}
+    seen = set()
+    used_names = set()
+    counts = {'converted': 0, 'unchanged': 0, 'removed': 0, 'conflicts': 0, 'excluded': 0}
+    workers = workers or os.cpu_count() or 1
+
+    with open(ini_path, 'r', encoding='utf-8-sig', errors='replace') as ini, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        batch = []
+        for name, entries in iter_sections(ini):
+            if name in seen:
+                # Duplicate section names: the first one wins, as in BleachBit
+                continue
+            seen.add(name)
+            if has_excludes(entries):
+                counts['excluded'] += 1
+                continue
+            filename = f'winapp2_{slugify(name)}.xml'
+            if filename in used_names:
+                filename = f'winapp2_{slugify(name)}_{hashlib.sha256(name.encode("utf-8")).hexdigest()[:8]}.xml'
+            used_names.add(filename)
+            if filename not in owned and os.path.lexists(os.path.join(output_dir, filename)):
+                print(f'Warning: skipping [{name}]: {filename} exists and was not written by this converter')
+                counts['conflicts'] += 1
+                continue
+
+            digest = section_hash(name, entries)
+            state[name] = {'hash': digest, 'file': filename}
+            old = previous.get(name)
+            if old == state[name] and os.path.exists(os.path.join(output_dir, filename)):
+                counts['unchanged'] += 1
+                continue
+
+            batch.append((filename, name, entries))
+            if len(batch) < BATCH_SIZE:
+                continue
+            pending.add(pool.submit(_write_sections, output_dir, batch))
+            batch = []
+            # Bound the number of sections held in memory while workers catch up
+            if len(pending) >= workers * QUEUE_DEPTH:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                counts['converted'] += sum(future.result() for future in done)
+        if batch:
+            pending.add(pool.submit(_write_sections, output_dir, batch))
+        counts['converted'] += sum(future.result() for future in pending)
+
+    # Entries that were removed, or whose file name changed, leave stale files behind
+    current_files = {entry['file'] for entry in state.values()}
+    for filename in owned - current_files:
+        path = os.path.join(output_dir, filename)
+        # State written before files were prefixed may name a hand-written cleaner
+        if not is_generated(path):
+            continue
+        os.remove(path)
+        counts['removed'] += 1
+
+    save_state(output_dir, state)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert winapp2.ini entries into BleachBit CleanerML files.')
+    parser.add_argument('ini', help='Path to winapp2.ini')
+    parser.add_argument('-o', '--output', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cleaners'),
+                        help='Directory for the generated XML files (default: the project cleaners directory)')
+    parser.add_argument('-j', '--jobs', type=int, help='Worker processes (default: number of CPUs)')
+    parser.add_argument('--force', action='store_true', help='Regenerate every entry, ignoring the previous run')
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.ini):
+        print(f'Error: {args.ini} not found')
+        return 1
+
+    counts = convert_file(args.ini, args.output, workers=args.jobs, force=args.force)
+    print(f"Converted {counts['converted']} entr{'y' if counts['converted'] == 1 else 'ies'}, "
+          f"{counts['unchanged']} unchanged, {counts['removed']} removed, "
+          f"{counts['conflicts']} skipped because of existing files, "
+          f"{counts['excluded']} skipped because they have ExcludeKey entries.")
+    print(f'Output directory: {args.output}')
+    return 0
+
+
+if __name__ == '__main__':
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print('\nOperation cancelled by user.')
+        sys.exit(1)